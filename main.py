@@ -1,8 +1,8 @@
 # main.py (at the project root)
 
 import sys
+import argparse
 from pathlib import Path
-import matplotlib.pyplot as plt
 
 # Establish the absolute project root and add 'src' to the path
 PROJECT_ROOT = Path(__file__).resolve().parent
@@ -11,27 +11,51 @@ sys.path.insert(0, str(SRC_PATH))
 
 from runner.runner import Runner
 
+# Scenarios run when no --scenarios are given on the command line
+DEFAULT_SCENARIOS = [
+    "question_1a",
+    "question_1b",
+    "question_1c",
+]
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run the consumer flexibility optimization scenarios.")
+    parser.add_argument("--scenarios", nargs="*", default=DEFAULT_SCENARIOS,
+                        help="Names of the data folders under data/ to run the operational model on.")
+    parser.add_argument("--investment-scalars", nargs="*", type=float, default=[],
+                        help="Investment cost scaling factors for the battery sizing model (e.g. 0.3 1.2 1.5).")
+    parser.add_argument("--investment-scenario", default="question_1c",
+                        help="Data folder used as the basis for the battery sizing runs.")
+    parser.add_argument("--headless", action="store_true",
+                        help="Save result plots as PNG files under results/ instead of opening plot windows.")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Number of processes used to solve the scenarios in parallel.")
+    parser.add_argument("--fail-fast", action="store_true",
+                        help="Stop at the first failing scenario instead of reporting it and continuing.")
+    return parser.parse_args()
+
 if __name__ == "__main__":
     try:
-   
-        SCENARIOS_TO_RUN = [
-            "question_1a",
-            "question_1b",
-            "question_1c",
+        args = parse_args()
 
-              ]
-        
-        runner = Runner(project_root_path=PROJECT_ROOT, scenarios_to_run=SCENARIOS_TO_RUN)
+        runner = Runner(project_root_path=PROJECT_ROOT, scenarios_to_run=args.scenarios, headless=args.headless,
+                        workers=args.workers, fail_fast=args.fail_fast)
         
         runner.run_all_scenarios()
-        #runner.run_investment_sizing(scenario_name="question_1c", investment_cost_scalar=0.3)
-        #runner.run_investment_sizing(scenario_name="question_1c", investment_cost_scalar=1.2)
-        #runner.run_investment_sizing(scenario_name="question_1c", investment_cost_scalar=1.5)
-        print("\nAll scenarios processed. Displaying plots.")
-        print("Close any plot window to exit the program.")
-        plt.show()
+        if args.investment_scalars:
+            runner.run_investment_sweep(scenario_name=args.investment_scenario,
+                                        investment_cost_scalars=args.investment_scalars)
+
+        if args.headless:
+            print(f"\nAll scenarios processed. Plots were saved to {runner.results_path}.")
+        else:
+            # pyplot is only needed from here on, to keep the generated plot windows open
+            import matplotlib.pyplot as plt
+            print("\nAll scenarios processed. Displaying plots.")
+            print("Close any plot window to exit the program.")
+            plt.show()
 
     except Exception as e:
         print(f"\nA critical error occurred in the main workflow: {e}")
         import traceback
-        traceback.print_exc()
\ No newline at end of file
+        traceback.print_exc()
@@ -1,3 +1,9 @@
 from .data_loader import DataLoader
-from .data_processor import DataProcessor
-from .data_visualizer import DataVisualizer
\ No newline at end of file
+from .data_processor import DataProcessor, HourlyParams
+
+def __getattr__(name):
+    # DataVisualizer pulls in matplotlib, so it is only imported when it is first used
+    if name == "DataVisualizer":
+        from .data_visualizer import DataVisualizer
+        return DataVisualizer
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
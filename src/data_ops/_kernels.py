@@ -0,0 +1,107 @@
+# src/data_ops/_kernels.py
+
+import functools
+import importlib.util
+import numpy as np
+
+# numba is only looked up here; it is imported, and each kernel compiled, on the first call of a
+# kernel, so runs that stay below NUMBA_MIN_HOURS never pay for the import
+HAVE_NUMBA = importlib.util.find_spec('numba') is not None
+
+
+def njit(**options):
+    """
+    Lazy version of numba.njit: the kernel is compiled with the given options on its first call,
+    or runs as plain Python/NumPy when numba is not installed.
+    """
+    def decorate(func):
+        compiled = None
+
+        @functools.wraps(func)
+        def kernel(*args):
+            nonlocal compiled
+            if compiled is None:
+                if HAVE_NUMBA:
+                    from numba import njit as numba_njit
+                    compiled = numba_njit(**options)(func)
+                else:
+                    compiled = func
+            return compiled(*args)
+        return kernel
+    return decorate
+
+# Horizon length above which the compiled kernels are used; for shorter horizons the
+# equivalent NumPy expressions are faster than the call overhead
+NUMBA_MIN_HOURS = 2000
+
+@njit(cache=True)
+def compute_reference(ratios, max_load, prices, tariff):
+    """
+    Builds the reference load profile (kW) from its hourly ratios and, in the same pass,
+    sums its total energy L_tot (kWh) and the cost C_I_tot (DKK) of importing all of it.
+    Only worth calling for long horizons, and only with numba installed.
+    """
+    ref = np.empty_like(ratios)
+    L_tot = 0.0
+    C_I_tot = 0.0
+    for h in range(ratios.shape[0]):
+        ref[h] = ratios[h] * max_load
+        L_tot += ref[h]
+        C_I_tot += ref[h] * (prices[h] + tariff)
+    return ref, L_tot, C_I_tot
+
+
+@njit(cache=True, fastmath=True)
+def hourly_cost(grid_import, grid_export, prices, import_tariff, export_tariff):
+    """
+    Hourly net cost (DKK): imports pay price + tariff, exports earn price - tariff.
+    Only worth calling for long horizons, and only with numba installed.
+    """
+    cost = np.empty_like(grid_import)
+    for h in range(grid_import.shape[0]):
+        cost[h] = grid_import[h] * (prices[h] + import_tariff) - grid_export[h] * (prices[h] - export_tariff)
+    return cost
+
+
+@njit(cache=True, nogil=True)
+def kpi_totals(pv_used, pv_curtailed, load, grid_import, grid_export, cost, prices, import_tariff, export_tariff):
+    """
+    All summed KPIs of one schedule in a single pass: PV used, PV curtailed, load, grid import,
+    grid export, net cost, cost of imports, revenue from exports and PV self-consumption.
+    NaN terms are skipped, as in ResultSummary's NumPy path (x == x is False only for NaN);
+    compiled without fastmath, which would let LLVM assume there are no NaNs.
+    """
+    s_pv = 0.0
+    s_curt = 0.0
+    s_load = 0.0
+    s_imp = 0.0
+    s_exp = 0.0
+    s_cost = 0.0
+    imp_price = 0.0
+    exp_price = 0.0
+    psc = 0.0
+    for h in range(pv_used.shape[0]):
+        if pv_used[h] == pv_used[h]:
+            s_pv += pv_used[h]
+        if pv_curtailed[h] == pv_curtailed[h]:
+            s_curt += pv_curtailed[h]
+        if load[h] == load[h]:
+            s_load += load[h]
+        if grid_import[h] == grid_import[h]:
+            s_imp += grid_import[h]
+        if grid_export[h] == grid_export[h]:
+            s_exp += grid_export[h]
+        if cost[h] == cost[h]:
+            s_cost += cost[h]
+        term = grid_import[h] * prices[h]
+        if term == term:
+            imp_price += term
+        term = grid_export[h] * prices[h]
+        if term == term:
+            exp_price += term
+        if pv_used[h] == pv_used[h] and load[h] == load[h]:
+            psc += pv_used[h] if pv_used[h] < load[h] else load[h]
+    # The tariffs apply to the total import/export: sum(x * (p + t)) = sum(x * p) + t * sum(x)
+    cost_imp = imp_price + import_tariff * s_imp
+    rev_exp = exp_price - export_tariff * s_exp
+    return s_pv, s_curt, s_load, s_imp, s_exp, s_cost, cost_imp, rev_exp, psc
@@ -1,18 +1,8 @@
 # -----------------------------
 # Load Data
 # -----------------------------
-import json
-import csv
-import pandas as pd
 from pathlib import Path
-
-from pathlib import Path
-from dataclasses import dataclass
-from logging import Logger
-import pandas as pd
-import xarray as xr
-import numpy as np
-import yaml
+from functools import cached_property
 from utils.utils import load_dataset
 
 
@@ -34,35 +24,46 @@ class DataLoader:
 
         self.input_path = Path(input_path)
         self.question = question_name
-        self.full_dataset = None
-        
+        # Files are only read and looked up when one of the properties below is first accessed
+
+    @cached_property
+    def full_dataset(self) -> dict:
         print(f"Loading dataset for question: '{self.question}'...")
-        self._load_dataset(self.question)
+        return self._load_dataset(self.question)
 
-        try:
-            #  load each file and assign it to a named attribute
-            self.appliance_params = self._load_data_file(self.question, "appliance_params.json")
-            self.bus_params = self._load_data_file(self.question, "bus_params.json")
-            self.consumer_params = self._load_data_file(self.question, "consumer_params.json")
-            self.der_production = self._load_data_file(self.question, "DER_production.json")
-            self.usage_preference = self._load_data_file(self.question, "usage_preference.json")
-            
-            print("Successfully loaded all data files.")
-
-        except (FileNotFoundError, ValueError) as e:
-            # If any file fails to load, we stop the process by re-raising the exception.
-            print(f"Error loading data for question '{self.question}'.")
-            raise e
-        pass
+    @cached_property
+    def appliance_params(self):
+        return self._load_data_file(self.question, "appliance_params.json")
+
+    @cached_property
+    def bus_params(self):
+        return self._load_data_file(self.question, "bus_params.json")
+
+    @cached_property
+    def consumer_params(self):
+        return self._load_data_file(self.question, "consumer_params.json")
+
+    @cached_property
+    def der_production(self):
+        return self._load_data_file(self.question, "DER_production.json")
+
+    @cached_property
+    def usage_preference(self):
+        return self._load_data_file(self.question, "usage_preference.json")
+
+    @cached_property
+    def storage_by_id(self) -> dict:
+        """ Storage appliance specs indexed by their storage_id. """
+        return {s['storage_id']: s for s in self.appliance_params.get('storage', [])}
 
     def _load_dataset(self, question_name: str):
 
-        self.full_dataset = load_dataset(self.question)
+        dataset = load_dataset(question_name, str(self.input_path))
         
-        if not self.full_dataset:
+        if not dataset:
             raise FileNotFoundError(f"No data was loaded for question '{self.question}'. "
-                                    f"Check that the directory '../data/{self.question}' exists and is not empty.")
-        pass
+                                    f"Check that the directory '{self.input_path / self.question}' exists and is not empty.")
+        return dataset
 
 
     def _load_data_file(self, question_name: str, file_name: str):
@@ -75,7 +76,6 @@ class DataLoader:
             # This error means the file was missing when _load_dataset ran
             raise KeyError(f"Data key '{file_key}' not found in the loaded dataset. "
                            f"Ensure the file '{file_name}' exists in the directory.")
-        pass
 
     def load_aux_data(self, question_name: str, filename: str):
         """
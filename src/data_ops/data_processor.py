@@ -1,8 +1,50 @@
 import json
 import csv
+import numpy as np
 import pandas as pd
 from pathlib import Path
+from dataclasses import dataclass
+from functools import lru_cache
 from data_ops.data_loader import DataLoader
+from data_ops._kernels import HAVE_NUMBA, NUMBA_MIN_HOURS, compute_reference
+
+
+@lru_cache(maxsize=None)
+def _read_only_zeros(n_hours: int) -> np.ndarray:
+    """ Shared, read-only float64 zeros used as the placeholder reference profile. """
+    zeros = np.zeros(n_hours, dtype=np.float64)
+    zeros.flags.writeable = False
+    return zeros
+
+
+@dataclass
+class HourlyParams:
+    """
+    Struct-of-arrays holding every parameter that varies by the hour.
+    Each field is a float64 array with one entry per hour of the horizon.
+    """
+    energy_price_dkk_kwh: np.ndarray
+    available_pv_kw: np.ndarray
+    reference_load_profile_kw: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.energy_price_dkk_kwh)
+
+    @property
+    def index(self) -> np.ndarray:
+        """ The hours of the horizon, mirroring the index of `to_frame()`. """
+        return np.arange(len(self))
+
+    def to_frame(self) -> pd.DataFrame:
+        """ Materializes the hourly parameters as a DataFrame indexed by hour (e.g. for plotting). """
+        df = pd.DataFrame.from_dict({
+            'energy_price_dkk_kwh': np.asarray(self.energy_price_dkk_kwh, dtype=np.float64),
+            'available_pv_kw': np.asarray(self.available_pv_kw, dtype=np.float64),
+            'reference_load_profile_kw': np.asarray(self.reference_load_profile_kw, dtype=np.float64)
+        }, dtype=np.float64)
+        df.index = pd.RangeIndex(len(self), name='hour')
+        return df
+
 
 class DataProcessor:
     """
@@ -10,7 +52,7 @@ class DataProcessor:
     an optimization model.
 
     It creates two main attributes:
-    1.  `hourly_params`: A DataFrame containing all parameters that vary by the hour.
+    1.  `hourly_params`: An HourlyParams instance with all parameters that vary by the hour.
     2.  `system_params`: A dictionary containing all system-wide, non-hourly parameters.
     """
     def __init__(self, data_loader: DataLoader):
@@ -32,36 +74,33 @@ class DataProcessor:
         """
         Orchestrates the data preparation process.
         """
-        # First, process hourly data and create the DataFrame
-        energy_prices = self.loader.bus_params[0]['energy_price_DKK_per_kWh']
+        # First, process hourly data into contiguous arrays
+        energy_prices = np.asarray(self.loader.bus_params[0]['energy_price_DKK_per_kWh'], dtype=np.float64)
         available_pv_kw = self._calculate_available_pv()
 
-        self.hourly_params = pd.DataFrame({
-            'energy_price_dkk_kwh': energy_prices,
-            'available_pv_kw': available_pv_kw
-        })
-        self.hourly_params.index.name = 'hour'
+        self.hourly_params = HourlyParams(
+            energy_price_dkk_kwh=energy_prices,
+            available_pv_kw=available_pv_kw,
+            reference_load_profile_kw=_read_only_zeros(len(energy_prices))
+        )
 
+        # Second, extract all single-value system parameters into a dictionary
         self.system_params = self._extract_system_parameters()
         
         # Add the reference profile to hourly_params if it exists
         if self.system_params.get('problem_type') == 'soft_constraint':
-            self.hourly_params['reference_load_profile_kw'] = self.system_params['reference_load_profile_kw']
-        else:
-            self.hourly_params['reference_load_profile_kw'] = [0] * 24
-        # Second, extract all single-value system parameters into a dictionary
-        self.system_params = self._extract_system_parameters()
+            self.hourly_params.reference_load_profile_kw = self.system_params['reference_load_profile_kw']
 
-    def _calculate_available_pv(self) -> list[float]:
+    def _calculate_available_pv(self) -> np.ndarray:
         """
         Calculates the actual hourly PV generation potential in kW.
         This is a key processing step: converting a ratio to an absolute value.
         """
         pv_max_power_kw = self.loader.appliance_params['DER'][0]['max_power_kW']
-        pv_hourly_ratios = self.loader.der_production[0]['hourly_profile_ratio']
+        pv_hourly_ratios = np.asarray(self.loader.der_production[0]['hourly_profile_ratio'], dtype=np.float64)
         
         # Calculate the actual available kW for each hour
-        return [ratio * pv_max_power_kw for ratio in pv_hourly_ratios]
+        return pv_hourly_ratios * pv_max_power_kw
 
     def _extract_system_parameters(self) -> dict:
         """
@@ -82,21 +121,24 @@ class DataProcessor:
             # This is a "soft constraint" problem
             params['problem_type'] = 'soft_constraint'
             
-            # First, calculate the reference profile in kW
-            max_load = params['max_load_power_kw']
-            ratios = load_prefs['hourly_profile_ratio']
-            ref_profile_kw = [r * max_load for r in ratios]
+            # Reference profile in kW, its total energy L_tot, and C_I^tot, the cost of
+            # inflexibly importing the entire reference load
+            ratios = np.asarray(load_prefs['hourly_profile_ratio'], dtype=np.float64)
+            max_load = float(params['max_load_power_kw'])
+            prices = self.hourly_params.energy_price_dkk_kwh
+            import_tariff = float(params['import_tariff_dkk_kwh'])
+            if HAVE_NUMBA and len(ratios) > NUMBA_MIN_HOURS:
+                # Long horizons: all three in one compiled pass
+                ref_profile_kw, L_tot, C_I_tot = compute_reference(ratios, max_load, prices, import_tariff)
+            else:
+                ref_profile_kw = ratios * max_load
+                L_tot = ref_profile_kw.sum()
+                C_I_tot = np.dot(ref_profile_kw, prices + import_tariff)
             params['reference_load_profile_kw'] = ref_profile_kw
+            params['L_tot'] = float(L_tot)
             
-            L_tot = sum(ref_profile_kw)
-            params['L_tot'] = L_tot
-            
-            # C_I^tot: Cost of inflexibly importing the entire reference load
-            prices = self.hourly_params['energy_price_dkk_kwh']
-            tariff = params['import_tariff_dkk_kwh']
-            C_I_tot = sum(ref_profile_kw[h] * (prices[h] + tariff) for h in range(24))
             # Handle case where C_I_tot is zero to avoid division by zero
-            params['C_I_tot'] = C_I_tot if C_I_tot > 0 else 1.0
+            params['C_I_tot'] = float(C_I_tot) if C_I_tot > 0 else 1.0
 
         else:
             # This is a "hard constraint" problem (Question 1a)
@@ -108,7 +150,7 @@ class DataProcessor:
             print("...Battery data detected. Configuring for battery optimization.")
             params['has_battery'] = True
             storage_prefs = self.loader.usage_preference[0]['storage_preferences'][0]
-            battery_specs = next((s for s in self.loader.appliance_params.get('storage', []) if s['storage_id'] == storage_prefs['storage_id']), None)
+            battery_specs = self.loader.storage_by_id.get(storage_prefs['storage_id'])
             
             if battery_specs:
                 params['battery_params'] = {
@@ -1,16 +1,39 @@
-import json
-import csv
+import os
+import hashlib
+import numpy as np
 import pandas as pd
 from pathlib import Path
-import matplotlib.pyplot as plt
-import seaborn as sns
+import matplotlib
+from matplotlib.figure import Figure
 from data_ops.data_processor import DataProcessor
 from typing import Dict, Optional
 
+# Batch/CI runs can set DSF_HEADLESS to select the non-interactive Agg backend
+# before pyplot is first imported
+if os.environ.get('DSF_HEADLESS'):
+    matplotlib.use('Agg')
+
+# White background with a light grid, as in seaborn's "whitegrid" style; set once at import
+matplotlib.rcParams.update({
+    'axes.grid': True,
+    'grid.color': '#dddddd',
+    'grid.linestyle': '--',
+    'grid.linewidth': 0.5,
+    'axes.facecolor': 'white',
+    'figure.facecolor': 'white'
+})
+
 class DataVisualizer:
     """
     Visualizes the prepared input data and the optimization results.
     """
+    # Legend entries of the results plot, in the order they are listed
+    _LEGEND_ORDER = ['PV Used', 'PV Curtailment', 'Battery Discharge', 'Grid Import',
+                     'Load Served', 'Battery Charge', 'Grid Export',
+                     'Electricity Price (DKK/kWh)', 'Battery SOC']
+    # Open input-data figures, keyed on a hash of the plotted arrays
+    _input_plot_cache: Dict[bytes, Figure] = {}
+
     def __init__(self, data_processor: DataProcessor, dual_values: Optional[Dict] = None):
         """
         Initializes the visualizer with processed data.
@@ -21,36 +44,53 @@ class DataVisualizer:
         """
         self.processor = data_processor
         self.dual_values = dual_values if dual_values is not None else {}
-        sns.set_theme(style="whitegrid")
+        # The last results figure, so close() can release it
+        self._fig = None
 
     def plot_input_data(self):
         """
         Creates a dual-axis plot of the key hourly inputs for the optimization model:
         energy price and available PV generation.
         """
-        fig, ax1 = plt.subplots(figsize=(12, 6))
+        import matplotlib.pyplot as plt
+
+        hourly_params = self.processor.hourly_params
+        key = hashlib.blake2b(
+            hourly_params.energy_price_dkk_kwh.tobytes() + hourly_params.available_pv_kw.tobytes(),
+            digest_size=16
+        ).digest()
+        # Forget figures that have been closed since, so the cache holds no dead figures
+        for stale_key in [k for k, f in self._input_plot_cache.items() if not plt.fignum_exists(f.number)]:
+            del self._input_plot_cache[stale_key]
+        cached_fig = self._input_plot_cache.get(key)
+        if cached_fig is not None:
+            # Identical inputs were already plotted, so just bring that figure back up
+            plt.figure(cached_fig.number)
+            plt.show()
+            return
+
+        hourly = hourly_params.to_frame()
+        fig, ax1 = plt.subplots(figsize=(12, 6), layout='constrained')
 
         # Plot Energy Price on the first y-axis
         color = 'tab:blue'
         ax1.set_xlabel('Hour of Day')
         ax1.set_ylabel('Energy Price (DKK/kWh)', color=color)
-        ax1.plot(self.processor.hourly_params.index, self.processor.hourly_params['energy_price_dkk_kwh'], color=color, marker='o', label='Energy Price')
+        ax1.plot(hourly.index, hourly['energy_price_dkk_kwh'], color=color, marker='o', label='Energy Price')
         ax1.tick_params(axis='y', labelcolor=color)
 
         # Create a second y-axis for PV generation
         ax2 = ax1.twinx()
         color = 'tab:green'
         ax2.set_ylabel('Available PV Generation (kW)', color=color)
-        ax2.bar(self.processor.hourly_params.index, self.processor.hourly_params['available_pv_kw'], color=color, alpha=0.6, label='Available PV')
+        ax2.bar(hourly.index, hourly['available_pv_kw'], color=color, alpha=0.6, label='Available PV')
         ax2.tick_params(axis='y', labelcolor=color)
 
         plt.title('Optimization Input Data')
-        fig.tight_layout()
+        self._input_plot_cache[key] = fig
         plt.show()
 
-# In src/data_ops/data_visualizer.py
-
-    def plot_optimization_results(self, results_df: pd.DataFrame, block: bool = True):
+    def plot_optimization_results(self, results_df: pd.DataFrame, block: bool = True, save_path: Optional[Path] = None):
         """
         Visualizes the full energy balance using side-by-side stacked bars,
         representing PV curtailment as a distinct stacked bar.
@@ -58,37 +98,47 @@ class DataVisualizer:
         Args:
             results_df (pd.DataFrame): The DataFrame with the optimal schedule.
             block (bool): Controls whether the plot pauses script execution.
+            save_path (Path, optional): If given, the figure is saved to this file
+                                        and closed instead of being shown.
+
+        Returns:
+            Figure: The figure the results were drawn on.
         """
-        fig, ax1 = plt.subplots(figsize=(18, 9))
-        hours = results_df.index
+        import matplotlib.pyplot as plt
+
+        # Constrained layout places the suptitle and legend in a single pass, without tight_layout
+        fig, ax1 = plt.subplots(figsize=(18, 9), layout='constrained')
+        self._fig = fig
+        # Plain arrays for every x position, so matplotlib does not convert the index on each call
+        hours = results_df.index.to_numpy()
         bar_width = 0.4
+        x_sources = hours - bar_width/2
+        x_sinks = hours + bar_width/2
 
         # --- Left Y-Axis (ax1): Power Flows (kW) ---
         ax1.set_xlabel('Hour of Day', fontsize=12)
         ax1.set_ylabel('Power (kW) & Electricity price (Dkk/kWh)', fontsize=12)
 
         # --- Bar Group 1 (Left Side): SOURCES ---
-        # 1. PV Generation that is USED is the base of the bar.
-        ax1.bar(hours - bar_width/2, results_df['pv_generation_kw'], width=bar_width, label='PV Used', color='gold')
-        ax1.bar(hours - bar_width/2, results_df['pv_curtailment_kw'], bottom=results_df['pv_generation_kw'], width=bar_width, label='PV Curtailment', color='red', alpha=0.7)
-
-        # 2. Battery Discharge is stacked on top of the TOTAL available PV (Used + Curtailed).
-        total_available_pv = self.processor.hourly_params['available_pv_kw']
-        if 'battery_discharge_kw' in results_df.columns:
-            ax1.bar(hours - bar_width/2, results_df['battery_discharge_kw'], bottom=total_available_pv, width=bar_width, label='Battery Discharge', color='lightcoral')
-
-        # 3. Grid Import is stacked on top of all other sources.
-        bottom_for_import = total_available_pv.copy()
-        if 'battery_discharge_kw' in results_df.columns:
-            bottom_for_import += results_df['battery_discharge_kw']
-        ax1.bar(hours - bar_width/2, results_df['grid_import_kw'], bottom=bottom_for_import, width=bar_width, label='Grid Import', color='deepskyblue')
+        # PV Used is the base of the bar, with PV Curtailment on top of it (together the TOTAL
+        # available PV), then Battery Discharge, and Grid Import stacked on top of all other sources.
+        self._plot_stacked_bars(ax1, x_sources, bar_width, results_df, [
+            ('pv_generation_kw', 'PV Used', 'gold', 1.0),
+            ('pv_curtailment_kw', 'PV Curtailment', 'red', 0.7),
+            ('battery_discharge_kw', 'Battery Discharge', 'lightcoral', 1.0),
+            ('grid_import_kw', 'Grid Import', 'deepskyblue', 1.0),
+        ])
      
         # --- Bar Group 2 (Right Side): SINKS ---
-        # 1. Load Served is the base sink
-        ax1.bar(hours + bar_width/2, results_df['flexible_load_kw'], width=bar_width, label='Load Served', color='dimgray')
-        
-
-        prices = self.processor.hourly_params['energy_price_dkk_kwh']
+        # Load Served is the base sink, Battery Charging is stacked on top of the load,
+        # and Grid Export is stacked on top of all sinks.
+        self._plot_stacked_bars(ax1, x_sinks, bar_width, results_df, [
+            ('flexible_load_kw', 'Load Served', 'dimgray', 1.0),
+            ('battery_charge_kw', 'Battery Charge', 'mediumpurple', 1.0),
+            ('grid_export_kw', 'Grid Export', 'mediumseagreen', 1.0),
+        ])
+
+        prices = self.processor.hourly_params.energy_price_dkk_kwh
         ax1.plot(
             hours,
             prices,
@@ -100,16 +150,6 @@ class DataVisualizer:
             zorder=10 # zorder ensures the line is drawn on top of the bars
         )
 
-
-        # 2. Battery Charging is stacked on top of the load
-        if 'battery_charge_kw' in results_df.columns:
-            ax1.bar(hours + bar_width/2, results_df['battery_charge_kw'], bottom=results_df['flexible_load_kw'], width=bar_width, label='Battery Charge', color='mediumpurple')
-
-        # 3. Grid Export is stacked on top of all sinks
-        bottom_for_export = results_df['flexible_load_kw'].copy()
-        if 'battery_charge_kw' in results_df.columns:
-            bottom_for_export += results_df['battery_charge_kw']
-        ax1.bar(hours + bar_width/2, results_df['grid_export_kw'], bottom=bottom_for_export, width=bar_width, label='Grid Export', color='mediumseagreen')
         # --- Right Y-Axis (ax2): Battery State of Charge (kWh) ---
         if 'battery_soc_kwh' in results_df.columns:
             ax2 = ax1.twinx()
@@ -124,10 +164,11 @@ class DataVisualizer:
                 battery_capacity = self.processor.system_params['battery_params'].get('capacity_kwh', 0)
 
 
+            soc = results_df['battery_soc_kwh'].to_numpy()
             if battery_capacity > 0:
-                soc_ratio = results_df['battery_soc_kwh'] / battery_capacity
+                soc_ratio = soc / battery_capacity
             else:
-                soc_ratio = results_df['battery_soc_kwh'] * 0 # Set to zero if no capacity
+                soc_ratio = np.zeros_like(soc) # Set to zero if no capacity
             ax2.plot(hours, soc_ratio, color=color, marker='.', linestyle=':', linewidth=2.5, label='Battery SOC')
             ax2.tick_params(axis='y', labelcolor=color)
             ax2.set_ylim(0, 1.1)
@@ -138,16 +179,43 @@ class DataVisualizer:
         ax1.axhline(0, color='black', linewidth=0.8)
         ax1.set_xticks(hours)
         
-        # Combine legends from both axes
+        # Combine legends from both axes, ordered by label rather than by draw order:
+        # Sources first, then Sinks, then the price and SOC lines
         lines, labels = ax1.get_legend_handles_labels()
         if 'ax2' in locals():
             lines2, labels2 = ax2.get_legend_handles_labels()
-            # Manually order the legend for better grouping
-            # Sources first, then Sinks, then SOC
-            order = [0, 1, 2, 3, 4, 5,6] # Adjust if you have more/fewer items
-            ax1.legend([lines[i] for i in order] + lines2, [labels[i] for i in order] + labels2, loc='upper left', fontsize=10, ncol=2)
+            lines, labels = lines + lines2, labels + labels2
+        rank = {label: i for i, label in enumerate(self._LEGEND_ORDER)}
+        order = sorted(range(len(labels)), key=lambda i: rank.get(labels[i], len(rank)))
+        ax1.legend([lines[i] for i in order], [labels[i] for i in order], loc='upper left', fontsize=10, ncol=2)
+
+        if save_path is not None:
+            fig.savefig(save_path, dpi=100)
+            self.close()
         else:
-            ax1.legend(loc='upper left', fontsize=10, ncol=2)
+            plt.show(block=block)
+        return fig
 
-        plt.tight_layout(rect=[0, 0, 1, 0.96])
-        plt.show(block=block)
\ No newline at end of file
+    @staticmethod
+    def _plot_stacked_bars(ax, x, bar_width: float, results_df: pd.DataFrame, layers: list):
+        """
+        Draws one stacked bar group. Each layer is a (column, label, color, alpha) tuple; layers whose
+        column is missing from the results (e.g. battery flows without a battery) are skipped.
+        The bottoms of all layers come from a single cumulative sum over the stacked columns.
+        Bars are rasterized, so vector output (PDF/SVG) of long horizons stays small and fast
+        to write, while the price and SOC lines drawn on top remain vector.
+        """
+        layers = [layer for layer in layers if layer[0] in results_df.columns]
+        values = np.vstack([results_df[column].to_numpy() for column, _, _, _ in layers])
+        bottoms = np.vstack([np.zeros(values.shape[1]), np.cumsum(values[:-1], axis=0)])
+        for i, (_, label, color, alpha) in enumerate(layers):
+            ax.bar(x, values[i], bottom=bottoms[i], width=bar_width, label=label, color=color, alpha=alpha,
+                   rasterized=True)
+
+    def close(self):
+        """ Closes the results figure once it is no longer needed. """
+        import matplotlib.pyplot as plt
+
+        if self._fig is not None:
+            plt.close(self._fig)
+            self._fig = None
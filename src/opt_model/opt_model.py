@@ -1,78 +1,283 @@
 # src/opt_model/opt_model.py
 
+import numpy as np
 import pandas as pd
 import gurobipy as gp
 from gurobipy import GRB
 from typing import Tuple, Dict, Optional
+from dataclasses import replace
+from data_ops.data_processor import HourlyParams
+from data_ops._kernels import HAVE_NUMBA, NUMBA_MIN_HOURS, hourly_cost
+
+# Gurobi environment shared by all models, started once on first use so the license
+# checkout happens only once per process
+_ENV = None
+
+def shared_env() -> gp.Env:
+    """ Returns the process-wide Gurobi environment (with solver output disabled). """
+    global _ENV
+    if _ENV is None:
+        _ENV = gp.Env(empty=True)
+        _ENV.setParam('OutputFlag', 0)
+        _ENV.start()
+    return _ENV
+
+# Gurobi parameters applied to every OptModel unless overridden. Aggressive presolve removes the
+# redundant PV split and box-bound rows before the LP is solved; the solve method is left at
+# Gurobi's default so dual values and warm starts keep a basis to work from.
+DEFAULT_SOLVER_PARAMS = {
+    'Presolve': 2,
+}
+
+def apply_solver_params(model: gp.Model, system_params: dict, solver_params: Optional[Dict] = None):
+    """
+    Sets Gurobi parameters on a model: DEFAULT_SOLVER_PARAMS, then any 'gurobi' entry of the
+    scenario's system_params, then the caller's solver_params (later ones take precedence).
+    """
+    params = {**DEFAULT_SOLVER_PARAMS, **system_params.get('gurobi', {}), **(solver_params or {})}
+    for name, value in params.items():
+        model.setParam(name, value)
+
+def build_results_df(columns: Dict, hourly_params: HourlyParams, system_params: Dict) -> pd.DataFrame:
+    """
+    Wraps the hourly result arrays of a model in a DataFrame, adding the PV self-consumption and
+    hourly cost columns. Shared by OptModel and OptModel_battery.
+    """
+    # PV that directly supplied the load in each hour
+    columns['pv_self_consumption_kw'] = np.minimum(columns['pv_generation_kw'], columns['flexible_load_kw'])
+
+    prices = hourly_params.energy_price_dkk_kwh
+    tariff_import = system_params['import_tariff_dkk_kwh']
+    tariff_export = system_params['export_tariff_dkk_kwh']
+    grid_import, grid_export = columns['grid_import_kw'], columns['grid_export_kw']
+    if HAVE_NUMBA and len(grid_import) > NUMBA_MIN_HOURS:
+        columns['hourly_cost_dkk'] = hourly_cost(grid_import, grid_export, prices, tariff_import, tariff_export)
+    else:
+        columns['hourly_cost_dkk'] = (grid_import * (prices + tariff_import)) - (grid_export * (prices - tariff_export))
+    return pd.DataFrame(columns)
 
 class OptModel:
     """
     Implements a data-driven optimization model that automatically adapts its
     structure based on the provided parameters. This version corrects the
     constraint logic to ensure all necessary constraints are always applied.
+
+    Models are built on the shared Gurobi environment, so an OptModel is cheap
+    to instantiate once per scenario in a loop.
     """
     
-    def __init__(self, hourly_params: pd.DataFrame, system_params: dict):
-        """ Initializes the optimization model with prepared data. """
+    def __init__(self, hourly_params: HourlyParams, system_params: dict, solver_params: Optional[Dict] = None,
+                 debug_names: bool = False):
+        """
+        Initializes the optimization model with prepared data.
+
+        Args:
+            hourly_params (HourlyParams): The hourly input arrays.
+            system_params (dict): The scalar system parameters.
+            solver_params (dict, optional): Gurobi parameters that override DEFAULT_SOLVER_PARAMS and
+                                            system_params['gurobi'], e.g. {'Presolve': 1} for small
+                                            problems, {'Threads': 1} when solving scenarios in parallel, or
+                                            {'Method': 2, 'Crossover': 0} for barrier without crossover.
+            debug_names (bool): If True, every constraint family is named (useful when writing the
+                                model to an .lp file). Otherwise only the constraints whose duals are
+                                reported are named, which saves one name string per row.
+        """
         self.hourly_params = hourly_params
         self.system_params = system_params
-        self.hours = range(len(self.hourly_params))
-        self.model = gp.Model("ConsumerFlexibility_DataDriven")
+        self.n_hours = len(self.hourly_params)
+        self.hours = range(self.n_hours)
+        self.debug_names = debug_names
+        self.model = gp.Model("ConsumerFlexibility_DataDriven", env=shared_env())
+        apply_solver_params(self.model, system_params, solver_params)
         self.vars = {}
         self.constraints = {}
 
-    def solve(self) -> Optional[Tuple[pd.DataFrame, Dict]]:
-        """ Builds and solves the model based on the data it was initialized with. """
-        self._define_variables()
-        self._define_objective() 
-        self._define_constraints()
-        
-        self.model.setParam('OutputFlag', 0)
-        
+    def solve(self, analytic: bool = True, extract_duals: bool = True) -> Optional[Tuple[pd.DataFrame, Dict]]:
+        """
+        Builds and solves the model based on the data it was initialized with.
+
+        Args:
+            analytic (bool): If True, problems with the closed-form structure of Question 1a
+                             are solved by a greedy NumPy dispatch instead of Gurobi.
+                             Pass False to always use Gurobi (e.g. to verify the fast path).
+            extract_duals (bool): If False, shadow prices are not extracted and an empty dict
+                                  is returned in their place (for runs that only need the schedule).
+        """
+        if analytic and self._analytic_applicable():
+            print("Solving analytically (greedy price-sorted dispatch)...")
+            return self._solve_analytic(extract_duals)
+
+        # Build the Gurobi model only once; calling solve() again just re-optimizes it, which
+        # returns immediately from the stored basis (use update_inputs() to change the data)
+        if not self.vars:
+            self._define_variables()
+            self._define_objective() 
+            self._define_constraints()
+        return self._optimize(extract_duals)
+
+    def update_inputs(self, energy_prices=None, available_pv=None,
+                      extract_duals: bool = True) -> Optional[Tuple[pd.DataFrame, Dict]]:
+        """
+        Re-solves the already built Gurobi model with new hourly prices and/or available PV.
+        Only the objective coefficients and the PV use upper bounds are changed, so the
+        constraint matrix is kept and Gurobi warm-starts from the previous basis.
+
+        Args:
+            energy_prices (array-like, optional): New hourly energy prices (DKK/kWh).
+            available_pv (array-like, optional): New hourly available PV generation (kW).
+            extract_duals (bool): If False, an empty dict is returned in place of the shadow prices.
+        """
+        if not self.vars:
+            raise RuntimeError("The Gurobi model has not been built yet; call solve(analytic=False) first.")
+
+        # Work on a copy so the caller's HourlyParams are left untouched
+        self.hourly_params = replace(self.hourly_params)
+        if energy_prices is not None:
+            self.hourly_params.energy_price_dkk_kwh = np.asarray(energy_prices, dtype=np.float64)
+            self._update_cost_coefficients()
+        if available_pv is not None:
+            self.hourly_params.available_pv_kw = np.asarray(available_pv, dtype=np.float64)
+            self.vars['pv_used'].UB = self.hourly_params.available_pv_kw
+        return self._optimize(extract_duals)
+
+    def _update_cost_coefficients(self):
+        """ Writes the import/export objective coefficients for the current prices into the model. """
+        scale = 1.0
+        if self.system_params.get('problem_type') == 'soft_constraint':
+            # The cost normalization benchmark depends on the prices, so recompute it as well
+            self.system_params = dict(self.system_params)
+            prices = self.hourly_params.energy_price_dkk_kwh
+            C_I_tot = float(self.hourly_params.reference_load_profile_kw @ (prices + self.system_params['import_tariff_dkk_kwh']))
+            self.system_params['C_I_tot'] = C_I_tot if C_I_tot > 0 else 1.0
+            scale = self.system_params.get('weight_cost', 0.5) / self.system_params['C_I_tot']
+
+        import_coef, export_coef = self._cost_coefficients(scale)
+        self.vars['import'].Obj = import_coef
+        self.vars['export'].Obj = -export_coef
+
+    def _optimize(self, extract_duals: bool = True) -> Optional[Tuple[pd.DataFrame, Dict]]:
+        """ Runs Gurobi on the built model and extracts the results. """
         print("Solving with Gurobi...")
         self.model.optimize()
         
         if self.model.Status == GRB.OPTIMAL:
             print("...Optimal solution found!")
             primal_results = self._extract_primal_results()
-            dual_results = self._extract_dual_results()
+            dual_results = self._extract_dual_results() if extract_duals else {}
             return primal_results, dual_results
         else:
             print(f"...Optimization finished with status code: {self.model.Status}.")
             return None, None
 
+    def _analytic_applicable(self) -> bool:
+        """
+        The greedy dispatch is exact for the hard-constraint problem without a battery, as long as
+        importing always costs something and importing to re-export is never profitable.
+        """
+        if self.system_params.get('problem_type') != 'hard_constraint' or self.system_params.get('has_battery', False):
+            return False
+        prices = self.hourly_params.energy_price_dkk_kwh
+        import_tariff = self.system_params['import_tariff_dkk_kwh']
+        export_tariff = self.system_params['export_tariff_dkk_kwh']
+        return bool(np.all(prices + import_tariff >= 0)) and import_tariff + export_tariff >= 0
+
+    def _solve_analytic(self, extract_duals: bool = True) -> Optional[Tuple[pd.DataFrame, Dict]]:
+        """
+        Solves the hard-constraint problem by greedy dispatch. Each hour can supply the load from
+        three segments with increasing marginal cost: PV that would be curtailed anyway (free),
+        PV that would otherwise be exported (the forgone export revenue), and grid import
+        (price + tariff). The cheapest segments over the whole day are filled until the
+        minimum daily energy is met.
+        """
+        n = self.n_hours
+        pv = self.hourly_params.available_pv_kw
+        prices = self.hourly_params.energy_price_dkk_kwh
+        import_cost = prices + self.system_params['import_tariff_dkk_kwh']
+        export_value = np.maximum(prices - self.system_params['export_tariff_dkk_kwh'], 0.0)
+        max_load = self.system_params['max_load_power_kw']
+        max_import = self.system_params['max_import_kw']
+        max_export = self.system_params['max_export_kw']
+        min_energy = self.system_params['min_daily_energy_kwh']
+
+        free_pv = np.where(export_value > 0, np.maximum(pv - max_export, 0.0), pv)
+        seg_size = np.stack([free_pv, pv - free_pv, np.full(n, float(max_import))], axis=1)
+        seg_cost = np.stack([np.zeros(n), export_value, import_cost], axis=1)
+        # The load cannot exceed its hourly limit, so cap each hour's segments at max_load
+        seg_end = np.cumsum(seg_size, axis=1)
+        seg_size = np.minimum(seg_end, max_load) - np.minimum(seg_end - seg_size, max_load)
+
+        order = np.argsort(seg_cost.ravel(), kind='stable')
+        sizes = seg_size.ravel()[order]
+        if sizes.sum() < min_energy - 1e-9:
+            print("...Analytic dispatch found the problem infeasible.")
+            return None, None
+        filled_before = np.cumsum(sizes) - sizes
+        taken = np.clip(min_energy - filled_before, 0.0, sizes)
+
+        taken_per_segment = np.empty_like(taken)
+        taken_per_segment[order] = taken
+        load = taken_per_segment.reshape(n, 3).sum(axis=1)
+
+        pv_to_load = np.minimum(load, pv)
+        export = np.where(export_value > 0, np.minimum(pv - pv_to_load, max_export), 0.0)
+        pv_used = pv_to_load + export
+        results_df = build_results_df({
+            'hour': np.arange(n),
+            'pv_generation_kw': pv_used,
+            'pv_curtailment_kw': pv - pv_used,
+            'flexible_load_kw': load,
+            'grid_import_kw': load - pv_to_load,
+            'grid_export_kw': export,
+        }, self.hourly_params, self.system_params)
+
+        print("...Optimal solution found!")
+        if not extract_duals:
+            return results_df, {}
+        # The shadow price of the minimum energy constraint is the cost of the last segment used
+        used = np.nonzero(taken > 0)[0]
+        shadow_price = float(seg_cost.ravel()[order][used[-1]]) if used.size else 0.0
+        return results_df, {'min_energy_shadow_price_dkk_kwh': shadow_price}
+
     def _define_variables(self):
         """ Defines all necessary decision variables based on the data. """
+        n = self.n_hours
         # --- Base energy flow variables (created for ALL scenarios) ---
         # These represent the fundamental choices the optimizer can make each hour.
-        # All are non-negative (lower bound lb=0).
-        self.vars['pv_used'] = self.model.addVars(self.hours, name="pv_used", lb=0)          # Power from PV that is actively used (kW)
-        self.vars['load'] = self.model.addVars(self.hours, name="load", lb=0)                # Power consumed by the flexible load (kW)
-        self.vars['import'] = self.model.addVars(self.hours, name="import", lb=0)            # Power imported from the grid (kW)
-        self.vars['export'] = self.model.addVars(self.hours, name="export", lb=0)            # Power exported to the grid (kW)
-        self.vars['pv_curtailed'] = self.model.addVars(self.hours, name="pv_curtailed", lb=0)  # Available PV power that is wasted (kW)
+        # Each family is a single MVar of length n; all are non-negative (lower bound lb=0).
+        # The hourly load and grid limits are simple bounds, so they are set as upper bounds (ub)
+        # rather than added as constraint rows. Likewise, PV use is bounded by the available PV;
+        # whatever is not used is curtailed, and that is computed from the solution afterwards.
+        max_load = self.system_params['max_load_power_kw']
+        max_import = self.system_params['max_import_kw']
+        max_export = self.system_params['max_export_kw']
+        self.vars['pv_used'] = self.model.addMVar(n, name="pv_used", lb=0, ub=self.hourly_params.available_pv_kw)  # Power from PV that is actively used (kW)
+        self.vars['load'] = self.model.addMVar(n, name="load", lb=0, ub=max_load)           # Power consumed by the flexible load (kW)
+        self.vars['import'] = self.model.addMVar(n, name="import", lb=0, ub=max_import)     # Power imported from the grid (kW)
+        self.vars['export'] = self.model.addMVar(n, name="export", lb=0, ub=max_export)     # Power exported to the grid (kW)
 
         # --- Conditional variables for the "soft constraint" model ---
         # These are only created if the data contains a reference load profile.
         if self.system_params.get('problem_type') == 'soft_constraint':
-            # These two variables are used to linearize the absolute value |L - L_ref|.
-            # Their sum will represent the total "discomfort" or deviation.
-            self.vars['dev_pos'] = self.model.addVars(self.hours, name="dev_pos", lb=0)      # Amount the load is ABOVE the reference profile (kW)
-            self.vars['dev_neg'] = self.model.addVars(self.hours, name="dev_neg", lb=0)      # Amount the load is BELOW the reference profile (kW)
+            # This variable is used to linearize the absolute value |L - L_ref|.
+            # Its sum will represent the total "discomfort" or deviation.
+            self.vars['dev_abs'] = self.model.addMVar(n, name="dev_abs", lb=0)      # Absolute deviation of the load from the reference profile (kW)
 
         # --- Conditional variables for the battery model ---
         # These are only created if the data indicates a battery is present.
         if self.system_params.get('has_battery', False):
-            # These variables model the battery's operation.
-            self.vars['charge'] = self.model.addVars(self.hours, name="charge", lb=0)        # Power flowing INTO the battery (kW)
-            self.vars['discharge'] = self.model.addVars(self.hours, name="discharge", lb=0)  # Power flowing OUT of the battery (kW)
-            self.vars['soc'] = self.model.addVars(self.hours, name="soc", lb=0)              # State of Charge: Energy stored in the battery (kWh)
+            # These variables model the battery's operation. The power and capacity ratings are
+            # their upper bounds.
+            bp = self.system_params['battery_params']
+            self.vars['charge'] = self.model.addMVar(n, name="charge", lb=0, ub=bp['max_charge_kw'])           # Power flowing INTO the battery (kW)
+            self.vars['discharge'] = self.model.addMVar(n, name="discharge", lb=0, ub=bp['max_discharge_kw'])  # Power flowing OUT of the battery (kW)
+            self.vars['soc'] = self.model.addMVar(n, name="soc", lb=0, ub=bp['capacity_kwh'])                  # State of Charge: Energy stored in the battery (kWh)
 
     def _define_objective(self):
         """Builds the objective function based on the problem type detected in the data."""
-        
+        soft = self.system_params.get('problem_type') == 'soft_constraint'
+
         # --- DATA-DRIVEN LOGIC: Check if this is a "soft constraint" problem ---
-        if self.system_params.get('problem_type') == 'soft_constraint':
+        if soft:
             # This block implements the normalized multi-objective function from the image.
             print("...Building NORMALIZED objective function (cost vs. comfort).")
             
@@ -80,140 +285,131 @@ class OptModel:
             C_I_tot = self.system_params['C_I_tot'] # Benchmark cost to import the entire reference load (DKK)
             L_tot = self.system_params['L_tot']     # Total energy of the reference load (kWh)
 
-            # --- Part 1: Calculate the actual energy cost (in DKK) ---
-            prices = self.hourly_params['energy_price_dkk_kwh']
-            import_tariff = self.system_params['import_tariff_dkk_kwh']
-            export_tariff = self.system_params['export_tariff_dkk_kwh']
-            energy_cost = gp.quicksum(
-                (self.vars['import'][h] * (prices[h] + import_tariff)) - \
-                (self.vars['export'][h] * (prices[h] - export_tariff))
-                for h in self.hours
-            )
-            
+            # Weighting factor between 0 and 1
+            x = self.system_params.get('weight_cost', 0.5)
+            cost_scale = x / C_I_tot
+        else: # This is the original 'hard_constraint' problem (like Question 1a)
+            # This block builds the simple cost-only objective function.
+            print("...Building COST-ONLY objective function.")
+            cost_scale = 1.0
+
+        # --- Part 1: Calculate the actual energy cost (in DKK) ---
+        # Built once for both problem types; the 1/C_I_tot normalization of the soft problem
+        # is folded into the cost coefficients themselves.
+        objective = self._energy_cost_expr(scale=cost_scale)
+
+        if soft:
             # --- Part 2: Calculate the total discomfort (in kWh) ---
             # This is the sum of deviations from the reference profile.
             # It's the linearized version of Σ|L - L_ref|.
-            discomfort = gp.quicksum(
-                self.vars['dev_pos'][h] + self.vars['dev_neg'][h] for h in self.hours
-            )
+            discomfort = self.vars['dev_abs'].sum()
             
             # --- Part 3: Combine into the final normalized objective ---
             # Each part is scaled by its benchmark, making them dimensionless and addable.
             # The optimizer will now minimize this combined "dissatisfaction score".
-              # Weighting factor between 0 and 1
-            x = self.system_params.get('weight_cost', 0.5)
-            normalized_objective = (x / C_I_tot) * energy_cost + ((1-x) / L_tot) *  discomfort
-            self.model.setObjective(normalized_objective, GRB.MINIMIZE)
-            
-        else: # This is the original 'hard_constraint' problem (like Question 1a)
-            # This block builds the simple cost-only objective function.
-            print("...Building COST-ONLY objective function.")
-            prices = self.hourly_params['energy_price_dkk_kwh']
-            import_tariff = self.system_params['import_tariff_dkk_kwh']
-            export_tariff = self.system_params['export_tariff_dkk_kwh']
-            
-            energy_cost = gp.quicksum(
-                (self.vars['import'][h] * (prices[h] + import_tariff)) - \
-                (self.vars['export'][h] * (prices[h] - export_tariff))
-                for h in self.hours
-            )
-            self.model.setObjective(energy_cost, GRB.MINIMIZE)
+            objective = objective + ((1-x) / L_tot) *  discomfort
+
+        self.model.setObjective(objective, GRB.MINIMIZE)
+
+    def _cost_coefficients(self, scale: float = 1.0) -> Tuple[np.ndarray, np.ndarray]:
+        """ Returns the hourly import cost (price + tariff) and export revenue (price - tariff), times scale. """
+        prices = self.hourly_params.energy_price_dkk_kwh
+        import_coef = scale * (prices + self.system_params['import_tariff_dkk_kwh'])
+        export_coef = scale * (prices - self.system_params['export_tariff_dkk_kwh'])
+        return import_coef, export_coef
+
+    def _energy_cost_expr(self, scale: float = 1.0) -> gp.MLinExpr:
+        """
+        Builds the daily energy cost (DKK): imports pay price + tariff, exports earn price - tariff.
+        The expression is assembled from precomputed coefficient arrays as two dot products; any
+        objective weight is passed as scale and applied to the arrays, not to the expression.
+        """
+        import_coef, export_coef = self._cost_coefficients(scale)
+        return self.vars['import'] @ import_coef - self.vars['export'] @ export_coef
 
     def _define_constraints(self):
+        # Each constraint family is added as one vector constraint over all hours.
+        pv_used = self.vars['pv_used']
+        load, imp, exp = self.vars['load'], self.vars['import'], self.vars['export']
+
         # --- 1. Base constraints (ALWAYS apply to all scenarios) ---
-        # The total PV used and curtailed must equal what's available from the sun.
-        self.model.addConstrs((
-            self.vars['pv_used'][h] + self.vars['pv_curtailed'][h] == self.hourly_params['available_pv_kw'][h]
-            for h in self.hours), name="pv_limit"
-        )
-        # Enforce the physical/contractual limits on grid interaction.
-        self.model.addConstrs((self.vars['import'][h] <= self.system_params['max_import_kw'] for h in self.hours), name="max_import")
-        self.model.addConstrs((self.vars['export'][h] <= self.system_params['max_export_kw'] for h in self.hours), name="max_export")
+        # The PV limit (used <= available) and the physical/contractual limits on grid interaction
+        # are all variable bounds, so no rows are needed for them.
 
         # --- 2. Load-specific constraints (mutually exclusive based on problem type) ---
         if self.system_params.get('problem_type') == 'soft_constraint':
             # For the soft constraint model, the load is flexible.
-            # It's constrained by its maximum physical power limit.
-            self.model.addConstrs((self.vars['load'][h] <= self.system_params['max_load_power_kw'] for h in self.hours), name="max_load_soft")
+            # It's constrained by its maximum physical power limit (the load variable bound).
             
-            # This crucial constraint linearizes the absolute value in the objective function.
-            # It links the actual load to the deviation variables: load - reference = positive_dev - negative_dev.
-            ref_profile = self.hourly_params['reference_load_profile_kw']
-            self.model.addConstrs((
-                self.vars['load'][h] - ref_profile[h] == self.vars['dev_pos'][h] - self.vars['dev_neg'][h]
-                for h in self.hours), name="deviation_definition"
-            )
+            # These crucial constraints linearize the absolute value in the objective function.
+            # The deviation variable must cover the load's distance from the reference in both
+            # directions; since it is minimized, it settles exactly on |load - reference|.
+            ref_profile = self.hourly_params.reference_load_profile_kw
+            dev_abs = self.vars['dev_abs']
+            self.model.addConstr(dev_abs >= load - ref_profile, name=self._name("deviation_above"))
+            self.model.addConstr(dev_abs >= ref_profile - load, name=self._name("deviation_below"))
         else: # This is the 'hard_constraint' problem (like Question 1a)
-            # The load is also flexible, constrained by its maximum power.
-            self.model.addConstrs((self.vars['load'][h] <= self.system_params['max_load_power_kw'] for h in self.hours), name="max_load_hard")
+            # The load is also flexible, constrained by its maximum power (the load variable bound).
             
             # This is the key constraint for 1a: total daily consumption must meet a minimum.
             self.constraints['min_total_daily_energy'] = self.model.addConstr(
-                gp.quicksum(self.vars['load'][h] for h in self.hours) >= self.system_params['min_daily_energy_kwh'], 
+                load.sum() >= self.system_params['min_daily_energy_kwh'], 
                 name="min_daily_energy"
             )
 
         # --- 3. Energy Balance and Battery constraints (mutually exclusive based on data) ---
         if self.system_params.get('has_battery', False):
+            charge, discharge, soc = self.vars['charge'], self.vars['discharge'], self.vars['soc']
             # This block is executed only if battery data was detected.
             # Energy balance WITH battery: Sources must equal Sinks.
-            self.constraints['energy_balance'] = self.model.addConstrs((
-                self.vars['pv_used'][h] + self.vars['import'][h] + self.vars['discharge'][h] == \
-                self.vars['load'][h] + self.vars['export'][h] + self.vars['charge'][h]
-                for h in self.hours), name="energy_balance_with_battery"
+            self.constraints['energy_balance'] = self.model.addConstr(
+                pv_used + imp + discharge == load + exp + charge, name="energy_balance_with_battery"
             )
-            # Add all battery-specific physical constraints.
+            # Add all battery-specific physical constraints (the power and capacity limits are variable bounds).
             bp = self.system_params['battery_params']
-            self.model.addConstrs((self.vars['charge'][h] <= bp['max_charge_kw'] for h in self.hours), name="max_charge")
-            self.model.addConstrs((self.vars['discharge'][h] <= bp['max_discharge_kw'] for h in self.hours), name="max_discharge")
-            self.model.addConstrs((self.vars['soc'][h] <= bp['capacity_kwh'] for h in self.hours), name="max_soc")
             
-            # This loop defines the battery's state-of-charge dynamics over time.
-            for h in self.hours:
-                # Get the SOC from the previous hour, or the initial SOC for the first hour.
-                prev_soc = bp['initial_soc_kwh'] if h == 0 else self.vars['soc'][h-1]
-                # SOC_now = SOC_before + Energy_in (with efficiency loss) - Energy_out (with efficiency loss).
-                self.model.addConstr(
-                    self.vars['soc'][h] == prev_soc + (self.vars['charge'][h] * bp['charge_efficiency']) - (self.vars['discharge'][h] / bp['discharge_efficiency']),
-                    name=f"soc_update_{h}"
-                )
+            # State-of-charge dynamics over time:
+            # SOC_now = SOC_before + Energy_in (with efficiency loss) - Energy_out (with efficiency loss).
+            # The first hour starts from the initial SOC, every later hour from the previous hour's SOC.
+            net_inflow = charge * bp['charge_efficiency'] - discharge * (1 / bp['discharge_efficiency'])
+            self.model.addConstr(soc[0] == bp['initial_soc_kwh'] + net_inflow[0], name=self._name("soc_initial"))
+            self.model.addConstr(soc[1:] == soc[:-1] + net_inflow[1:], name=self._name("soc_update"))
             # Enforce that the battery must end the day at a specific energy level.
-            self.model.addConstr(self.vars['soc'][self.hours[-1]] == bp['final_soc_kwh'], name="final_soc")
+            self.model.addConstr(soc[-1] == bp['final_soc_kwh'], name=self._name("final_soc"))
         else:
             # If no battery is present, use the simpler energy balance equation.
-            self.constraints['energy_balance'] = self.model.addConstrs((
-                self.vars['pv_used'][h] + self.vars['import'][h] == self.vars['load'][h] + self.vars['export'][h]
-                for h in self.hours), name="energy_balance_no_battery"
+            self.constraints['energy_balance'] = self.model.addConstr(
+                pv_used + imp == load + exp, name="energy_balance_no_battery"
             )
 
+    def _name(self, name: str) -> str:
+        """ Returns the constraint name to use: the name itself in debug mode, otherwise none. """
+        return name if self.debug_names else ""
+
     def _extract_primal_results(self) -> pd.DataFrame:
         """ Extracts the PRIMAL solution (the DataFrame). """
-        results = []
-        for h in self.hours:
-            hour_data = {
-                'hour': h,
-                'pv_generation_kw': self.vars['pv_used'][h].X,
-                'pv_curtailment_kw': self.vars['pv_curtailed'][h].X,
-                'flexible_load_kw': self.vars['load'][h].X,
-                'grid_import_kw': self.vars['import'][h].X,
-                'grid_export_kw': self.vars['export'][h].X,
-            }
-            if self.system_params.get('problem_type') == 'soft_constraint':
-                hour_data['deviation_kw'] = self.vars['dev_pos'][h].X - self.vars['dev_neg'][h].X
-            if self.system_params.get('has_battery', False):
-                hour_data['battery_charge_kw'] = self.vars['charge'][h].X
-                hour_data['battery_discharge_kw'] = self.vars['discharge'][h].X
-                hour_data['battery_soc_kwh'] = self.vars['soc'][h].X
-            results.append(hour_data)
+        # Each variable family is fetched as one array instead of one .X access per hour
+        pv_used = self._var_values('pv_used')
+        columns = {
+            'hour': np.arange(self.n_hours),
+            'pv_generation_kw': pv_used,
+            'pv_curtailment_kw': self.hourly_params.available_pv_kw - pv_used,
+            'flexible_load_kw': self._var_values('load'),
+            'grid_import_kw': self._var_values('import'),
+            'grid_export_kw': self._var_values('export'),
+        }
+        if self.system_params.get('problem_type') == 'soft_constraint':
+            columns['deviation_kw'] = columns['flexible_load_kw'] - self.hourly_params.reference_load_profile_kw
+        if self.system_params.get('has_battery', False):
+            columns['battery_charge_kw'] = self._var_values('charge')
+            columns['battery_discharge_kw'] = self._var_values('discharge')
+            columns['battery_soc_kwh'] = self._var_values('soc')
         
-        results_df = pd.DataFrame(results)
+        return build_results_df(columns, self.hourly_params, self.system_params)
 
-        prices = self.hourly_params['energy_price_dkk_kwh']
-        tariff_import = self.system_params['import_tariff_dkk_kwh']
-        tariff_export = self.system_params['export_tariff_dkk_kwh']
-        results_df['hourly_cost_dkk'] = (results_df['grid_import_kw'] * (prices + tariff_import)) - \
-                                       (results_df['grid_export_kw'] * (prices - tariff_export))
-        return results_df
+    def _var_values(self, key: str) -> np.ndarray:
+        """ Returns the solution values of one hourly variable family as an array. """
+        return self.vars[key].X
 
     def _extract_dual_results(self) -> Dict:
         """
@@ -222,7 +418,7 @@ class OptModel:
         duals = {}
         
         if 'min_total_daily_energy' in self.constraints:
-            duals['min_energy_shadow_price_dkk_kwh'] = self.constraints['min_total_daily_energy'].Pi
+            duals['min_energy_shadow_price_dkk_kwh'] = float(self.constraints['min_total_daily_energy'].Pi)
             
 
         elif self.system_params.get('problem_type') == 'soft_constraint' and 'energy_balance' in self.constraints:
@@ -230,10 +426,10 @@ class OptModel:
             C_I_tot = self.system_params.get('C_I_tot', 1)
             energy_balance_constrs = self.constraints['energy_balance']
             
-            raw_duals = [energy_balance_constrs[h].Pi for h in self.hours]
+            raw_duals = energy_balance_constrs.Pi
             
             # Un-scale each hourly dual to convert it back to DKK/kWh
-            unscaled_duals = [d * C_I_tot for d in raw_duals]
-            duals['hourly_marginal_price_dkk_kwh'] = unscaled_duals
+            unscaled_duals = raw_duals * C_I_tot
+            duals['hourly_marginal_price_dkk_kwh'] = unscaled_duals.tolist()
             
         return duals
\ No newline at end of file
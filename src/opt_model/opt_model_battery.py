@@ -1,35 +1,48 @@
 # src/opt_model/opt_model_investment.py
 
+import numpy as np
 import pandas as pd
 import gurobipy as gp
 from gurobipy import GRB
 from typing import Tuple, Dict, Optional
+from data_ops.data_processor import HourlyParams
+from opt_model.opt_model import shared_env, apply_solver_params, build_results_df
 
 class OptModel_battery:
     """
     Implements a Mixed-Integer Linear Program (MILP) to co-optimize
     battery investment size and daily operational strategy.
     """
-    def __init__(self, hourly_params: pd.DataFrame, system_params: dict):
+    def __init__(self, hourly_params: HourlyParams, system_params: dict, solver_params: Optional[Dict] = None):
+        """
+        Initializes the investment model with prepared data. solver_params, like
+        system_params['gurobi'], overrides the default Gurobi parameters.
+        """
         self.hourly_params = hourly_params
         self.system_params = system_params
-        self.hours = range(len(self.hourly_params))
-        self.model = gp.Model("BatteryInvestment")
+        self.n_hours = len(self.hourly_params)
+        self.hours = range(self.n_hours)
+        self.model = gp.Model("BatteryInvestment", env=shared_env())
+        apply_solver_params(self.model, system_params, solver_params)
         self.vars = {}
         # This model doesn't need to store constraint handles for duals
         # as the primary output is the investment size.
 
     def solve(self, capital_cost_per_kwh: float) -> Optional[Tuple[pd.DataFrame, Dict]]:
         """
-        Builds and solves the integrated investment model.
+        Builds and solves the integrated investment model. Once the model is built, later calls
+        only change the capital cost coefficient of the battery capacity and re-optimize, so a
+        sweep over investment costs warm-starts each solve from the previous basis.
         """
         self.capital_cost = capital_cost_per_kwh
+
+        if not self.vars:
+            self._define_variables()
+            self._define_objective()
+            self._define_constraints()
+        else:
+            self.vars['battery_capacity'].Obj = capital_cost_per_kwh
         
-        self._define_variables()
-        self._define_objective()
-        self._define_constraints()
-        
-        self.model.setParam('OutputFlag', 0)
         self.model.optimize()
         
         if self.model.Status == GRB.OPTIMAL:
@@ -41,27 +54,26 @@ class OptModel_battery:
 
     def _define_variables(self):
         """ Defines decision variables for both operation and investment. """
-        self.vars['pv_used'] = self.model.addVars(self.hours, name="pv_used", lb=0)
-        self.vars['load'] = self.model.addVars(self.hours, name="load", lb=0)
-        self.vars['import'] = self.model.addVars(self.hours, name="import", lb=0)
-        self.vars['export'] = self.model.addVars(self.hours, name="export", lb=0)
-        self.vars['pv_curtailed'] = self.model.addVars(self.hours, name="pv_curtailed", lb=0)
-        self.vars['charge'] = self.model.addVars(self.hours, name="charge", lb=0)
-        self.vars['discharge'] = self.model.addVars(self.hours, name="discharge", lb=0)
-        self.vars['soc'] = self.model.addVars(self.hours, name="soc", lb=0)
+        n = self.n_hours
+        # Each hourly family is a single MVar of length n
+        # PV use is bounded by the available PV; the rest is curtailed (computed after solving)
+        self.vars['pv_used'] = self.model.addMVar(n, name="pv_used", lb=0, ub=self.hourly_params.available_pv_kw)
+        self.vars['load'] = self.model.addMVar(n, name="load", lb=0)
+        self.vars['import'] = self.model.addMVar(n, name="import", lb=0)
+        self.vars['export'] = self.model.addMVar(n, name="export", lb=0)
+        self.vars['charge'] = self.model.addMVar(n, name="charge", lb=0)
+        self.vars['discharge'] = self.model.addMVar(n, name="discharge", lb=0)
+        self.vars['soc'] = self.model.addMVar(n, name="soc", lb=0)
         self.vars['battery_capacity'] = self.model.addVar(name="battery_capacity", lb=0)
 
     def _define_objective(self):
         """ Combines daily operational cost (OPEX) and amortized capital cost (CAPEX). """
-        prices = self.hourly_params['energy_price_dkk_kwh']
-        import_tariff = self.system_params['import_tariff_dkk_kwh']
-        export_tariff = self.system_params['export_tariff_dkk_kwh']
-        
-        operational_cost = gp.quicksum(
-            (self.vars['import'][h] * (prices[h] + import_tariff)) - \
-            (self.vars['export'][h] * (prices[h] - export_tariff))
-            for h in self.hours
-        )
+        prices = self.hourly_params.energy_price_dkk_kwh
+        # Per-hour coefficients computed once on the arrays
+        import_coef = prices + self.system_params['import_tariff_dkk_kwh']
+        export_coef = prices - self.system_params['export_tariff_dkk_kwh']
+
+        operational_cost = self.vars['import'] @ import_coef - self.vars['export'] @ export_coef
         
         daily_investment_cost = self.capital_cost * self.vars['battery_capacity']
 
@@ -69,15 +81,12 @@ class OptModel_battery:
 
     def _define_constraints(self):
         """ Defines constraints linking operation to the chosen investment size. """
-        ref_profile = self.hourly_params['reference_load_profile_kw']
-        available_pv = self.hourly_params['available_pv_kw']
-        
-        self.model.addConstrs((
-            self.vars['pv_used'][h] + self.vars['pv_curtailed'][h] == available_pv[h]
-            for h in self.hours), name="pv_production_limit"
-        )
-        
-        self.model.addConstrs((self.vars['load'][h] == ref_profile[h] for h in self.hours), name="fixed_load_profile")
+        # Each constraint family is added as one vector constraint over all hours.
+        pv_used = self.vars['pv_used']
+        load, imp, exp = self.vars['load'], self.vars['import'], self.vars['export']
+        charge, discharge, soc = self.vars['charge'], self.vars['discharge'], self.vars['soc']
+
+        self.model.addConstr(load == self.hourly_params.reference_load_profile_kw, name="fixed_load_profile")
         
         base_battery_params = self.system_params['battery_params']
         base_capacity = base_battery_params['capacity_kwh']
@@ -86,49 +95,45 @@ class OptModel_battery:
         discharge_to_energy_ratio = base_battery_params['max_discharge_kw'] / base_capacity
 
         capacity_var = self.vars['battery_capacity']
-        self.model.addConstrs((self.vars['soc'][h] <= capacity_var for h in self.hours), name="max_soc")
-        self.model.addConstrs((self.vars['charge'][h] <= charge_to_energy_ratio * capacity_var for h in self.hours), name="max_charge")
-        self.model.addConstrs((self.vars['discharge'][h] <= discharge_to_energy_ratio * capacity_var for h in self.hours), name="max_discharge")
-        
-        for h in self.hours:
-            prev_soc = 0.5 * capacity_var if h == 0 else self.vars['soc'][h-1]
-            self.model.addConstr(
-                self.vars['soc'][h] == prev_soc + (self.vars['charge'][h] * base_battery_params['charge_efficiency']) - (self.vars['discharge'][h] / base_battery_params['discharge_efficiency']),
-                name=f"soc_update_{h}"
-            )
-        self.model.addConstr(self.vars['soc'][self.hours[-1]] == 0.5 * capacity_var, name="final_soc")
-
-        self.model.addConstrs((
-            self.vars['pv_used'][h] + self.vars['import'][h] + self.vars['discharge'][h] == \
-            self.vars['load'][h] + self.vars['export'][h] + self.vars['charge'][h]
-            for h in self.hours), name="energy_balance"
+        self.model.addConstr(soc <= capacity_var, name="max_soc")
+        # Shared power rating: with a charge/discharge mode u in [0, 1], charge <= ratio_c * capacity * u
+        # and discharge <= ratio_d * capacity * (1 - u). Projecting out u (and its McCormick product
+        # with the capacity) leaves one row per hour, which also implies the separate charge and
+        # discharge limits and rules out full-power simultaneous charging and discharging.
+        self.model.addConstr(
+            charge * (1 / charge_to_energy_ratio) + discharge * (1 / discharge_to_energy_ratio) <= capacity_var,
+            name="max_power"
         )
+        
+        # The battery starts half full; every later hour continues from the previous hour's SOC
+        net_inflow = charge * base_battery_params['charge_efficiency'] - discharge * (1 / base_battery_params['discharge_efficiency'])
+        self.model.addConstr(soc[0] == 0.5 * capacity_var + net_inflow[0], name="soc_initial")
+        self.model.addConstr(soc[1:] == soc[:-1] + net_inflow[1:], name="soc_update")
+        self.model.addConstr(soc[-1] == 0.5 * capacity_var, name="final_soc")
+
+        self.model.addConstr(pv_used + imp + discharge == load + exp + charge, name="energy_balance")
 
     def _extract_primal_results(self) -> pd.DataFrame:
         """ Extracts the optimal values of all decision variables. """
-        results = []
-        for h in self.hours:
-            hour_data = {
-                'hour': h,
-                'pv_generation_kw': self.vars['pv_used'][h].X,
-                'pv_curtailment_kw': self.vars['pv_curtailed'][h].X,
-                'flexible_load_kw': self.vars['load'][h].X,
-                'grid_import_kw': self.vars['import'][h].X,
-                'grid_export_kw': self.vars['export'][h].X,
-                'battery_charge_kw': self.vars['charge'][h].X,
-                'battery_discharge_kw': self.vars['discharge'][h].X,
-                'battery_soc_kwh': self.vars['soc'][h].X,
-            }
-            results.append(hour_data)
-        
-        results_df = pd.DataFrame(results)
-
-        prices = self.hourly_params['energy_price_dkk_kwh']
-        tariff_import = self.system_params['import_tariff_dkk_kwh']
-        tariff_export = self.system_params['export_tariff_dkk_kwh']
-        results_df['hourly_cost_dkk'] = (results_df['grid_import_kw'] * (prices + tariff_import)) - \
-                                       (results_df['grid_export_kw'] * (prices - tariff_export))
-        return results_df
+        # Each variable family is fetched as one array instead of one .X access per hour
+        pv_used = self._var_values('pv_used')
+        load = self._var_values('load')
+        columns = {
+            'hour': np.arange(self.n_hours),
+            'pv_generation_kw': pv_used,
+            'pv_curtailment_kw': self.hourly_params.available_pv_kw - pv_used,
+            'flexible_load_kw': load,
+            'grid_import_kw': self._var_values('import'),
+            'grid_export_kw': self._var_values('export'),
+            'battery_charge_kw': self._var_values('charge'),
+            'battery_discharge_kw': self._var_values('discharge'),
+            'battery_soc_kwh': self._var_values('soc'),
+        }
+        return build_results_df(columns, self.hourly_params, self.system_params)
+
+    def _var_values(self, key: str) -> np.ndarray:
+        """ Returns the solution values of one hourly variable family as an array. """
+        return self.vars[key].X
 
     def _extract_dual_results(self) -> Dict:
         """ Also extracts the optimal investment decision. """
@@ -1,84 +1,145 @@
 # src/runner/runner.py
 
-import os
+import io
+import contextlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from matplotlib import pyplot as plt
+from typing import Dict, Optional
 # Import all the necessary components
 from data_ops.data_loader import DataLoader
 from data_ops.data_processor import DataProcessor
-from data_ops.data_visualizer import DataVisualizer
 from opt_model.opt_model import OptModel 
 from utils.summary import ResultSummary
 from opt_model.opt_model_battery import OptModel_battery
 
+def _solve_scenario_worker(data_path: str, scenario_name: str):
+    """
+    Process-pool entry point: loads and solves one scenario in a worker process. Gurobi is limited
+    to one thread per worker, and the console output is captured so the parent can print it in
+    scenario order.
+    """
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log):
+        processor = DataProcessor(DataLoader(input_path=data_path, question_name=scenario_name))
+        model = OptModel(processor.hourly_params, processor.system_params, solver_params={'Threads': 1})
+        results_df, dual_values = model.solve()
+    return log.getvalue(), processor, results_df, dual_values
+
 class Runner:
     """
     Orchestrates the full workflow for a list of specified optimization scenarios.
     """
-    def __init__(self, project_root_path: Path, scenarios_to_run: list):
+    def __init__(self, project_root_path: Path, scenarios_to_run: list, headless: bool = False, workers: int = 1,
+                 fail_fast: bool = False):
         """
         Initializes the Runner for a list of scenarios.
 
         Args:
             project_root_path (Path): The absolute path to the project root.
             scenarios_to_run (list): A list of scenario names to execute.
+            headless (bool): If True, result plots are saved as PNG files under
+                             'results/' instead of being shown in windows.
+            workers (int): Number of processes used to solve the scenarios of run_all_scenarios
+                           in parallel. With 1 (the default) they are solved one after another.
+            fail_fast (bool): If True, the first error aborts the run instead of being reported
+                              and skipped.
         """
         self.project_root = project_root_path
         self.scenarios = scenarios_to_run
+        self.headless = headless
+        self.workers = workers
+        self.fail_fast = fail_fast
+        if headless:
+            # Plots are only saved, so use the non-interactive backend: no windows are created
+            # and no GUI event loop runs for any of the figures
+            import matplotlib
+            matplotlib.use('Agg', force=True)
         
         # Define paths reliably from the absolute project root
         self.data_path = self.project_root / "data"
         self.src_path = self.project_root / "src"
+        self.results_path = self.project_root / "results"
+
+        # Processed input data per scenario name, so repeated runs (e.g. an investment cost sweep)
+        # load and process each scenario only once
+        self._processor_cache = {}
         
         print(f"--- Runner initialized for {len(self.scenarios)} scenarios: {self.scenarios} ---")
 
-    def run_all_scenarios(self):
+    def run_all_scenarios(self) -> list:
         """
-        Executes the full pipeline for every scenario in the list.
+        Executes the full pipeline for every scenario in the list. A failing scenario is reported
+        and skipped so the remaining scenarios still run, unless the Runner was created with fail_fast.
+
+        Returns:
+            list: One (scenario_name, ok, result) tuple per scenario, where result is the
+                  (results_df, dual_values) pair on success and the raised exception on failure.
         """
-        original_cwd = Path.cwd()
+        statuses = []
+        executor = None
+        futures = [None] * len(self.scenarios)
         try:
-            # Change CWD to the reliable 'src' path for utils.py to work
-            os.chdir(self.src_path)
+            if self.workers > 1 and len(self.scenarios) > 1:
+                # Solve all scenarios up front in worker processes; the summaries and plots below
+                # still run here, in scenario order. Workers are spawned rather than forked so
+                # none of them inherits this process's Gurobi environment.
+                executor = ProcessPoolExecutor(max_workers=min(self.workers, len(self.scenarios)),
+                                               mp_context=multiprocessing.get_context('spawn'))
+                futures = [executor.submit(_solve_scenario_worker, str(self.data_path), name) for name in self.scenarios]
 
             # Loop through each configured scenario
-            for scenario_name in self.scenarios:
+            for scenario_name, future in zip(self.scenarios, futures):
                 print(f"\n{'='*20} Starting Scenario: {scenario_name} {'='*20}")
+                try:
+                    statuses.append((scenario_name, True, self._run_scenario(scenario_name, future)))
+                except Exception as e:
+                    if self.fail_fast:
+                        raise
+                    print(f"\nAn ERROR occurred in scenario '{scenario_name}': {e}")
+                    import traceback
+                    traceback.print_exc()
+                    statuses.append((scenario_name, False, e))
                 
-                loader = DataLoader(input_path="../data", question_name=scenario_name)
-                processor = DataProcessor(loader)
+                print(f"{'='*20} Finished Scenario: {scenario_name} {'='*20}")
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
 
-                model = OptModel(processor.hourly_params, processor.system_params)
-                results_df, dual_values = model.solve()
+        failed = [name for name, ok, _ in statuses if not ok]
+        if failed:
+            print(f"\n{len(failed)} of {len(statuses)} scenarios failed: {failed}")
+        return statuses
 
-                if results_df is not None:
-                    summary = ResultSummary(
-                        results_df=results_df, 
-                        hourly_params=processor.hourly_params, 
-                        system_params=processor.system_params,
-                        dual_values=dual_values
-                    )
-                    summary.print_summary()
-                    
-                    visualizer = DataVisualizer(processor)
-                    visualizer.plot_optimization_results(results_df, block=False)
-                    
-                    # Give each plot window a unique title
-                    fig = plt.gcf()
-                    fig.canvas.manager.set_window_title(f"Results for {scenario_name}")
-
-                else:
-                    print("...No results to summarize or visualize as the optimization failed.")
-                
-                print(f"{'='*20} Finished Scenario: {scenario_name} {'='*20}")
+    def _run_scenario(self, scenario_name: str, future=None):
+        """
+        Solves one scenario (or collects its result from a worker process), then prints its
+        summary and plots its results.
+        """
+        if future is not None:
+            log, processor, results_df, dual_values = future.result()
+            print(log, end="")
+            self._processor_cache.setdefault(scenario_name, processor)
+        else:
+            processor = self._get_processor(scenario_name)
 
-        except Exception as e:
-            print(f"\nAn ERROR occurred during the run: {e}")
-            import traceback
-            traceback.print_exc()
-        finally:
-            # Always change back to the original directory
-            os.chdir(original_cwd)
+            model = OptModel(processor.hourly_params, processor.system_params)
+            results_df, dual_values = model.solve()
+
+        if results_df is not None:
+            summary = ResultSummary(
+                results_df=results_df, 
+                hourly_params=processor.hourly_params, 
+                system_params=processor.system_params,
+                dual_values=dual_values
+            )
+            summary.print_summary()
+            
+            self._plot_results(processor, results_df, f"Results for {scenario_name}", f"results_{scenario_name}.png")
+
+        else:
+            print("...No results to summarize or visualize as the optimization failed.")
+        return results_df, dual_values
 
     def run_investment_sizing(self, scenario_name: str, investment_cost_scalar: float = 1.0):
         """
@@ -88,49 +149,107 @@ class Runner:
             scenario_name (str): The name of the data scenario to use (e.g., 'question_1c').
             investment_cost_scalar (float): A factor to scale the base investment cost.
                                             1.0 is the base cost, 2.0 is double the cost, etc.
+
+        Returns:
+            tuple: The (investment_cost_scalar, ok, result) tuple of the run, as in run_investment_sweep.
+        """
+        return self.run_investment_sweep(scenario_name, [investment_cost_scalar])[0]
+
+    def run_investment_sweep(self, scenario_name: str, investment_cost_scalars: list) -> list:
+        """
+        Runs the investment model for several investment cost scaling factors. The model is built
+        once and only its capital cost coefficient changes between runs, so every solve after the
+        first warm-starts from the previous optimal basis. A failing run is reported and skipped so
+        the remaining factors still run, unless the Runner was created with fail_fast.
+
+        Args:
+            scenario_name (str): The name of the data scenario to use (e.g., 'question_1c').
+            investment_cost_scalars (list): The factors to scale the base investment cost by.
+
+        Returns:
+            list: One (investment_cost_scalar, ok, result) tuple per factor, where result is the
+                  (results_df, dual_values) pair on success and the raised exception on failure.
         """
-        print(f"\n{'='*20} Starting Investment Sizing for: {scenario_name} {'='*20}")
-        print(f"Using investment cost scaling factor: {investment_cost_scalar}")
-        
-        original_cwd = Path.cwd()
         try:
-            os.chdir(self.src_path)
-            
             # Load and process the data for the scenario
-            loader = DataLoader(input_path="../data", question_name=scenario_name)
-            processor = DataProcessor(loader)
-            
-            # Define the base capital cost
-            base_capital_cost_per_kwh = 1/6 # DKK/kWh/day
-            scaled_capital_cost = base_capital_cost_per_kwh * investment_cost_scalar
-            print(f"Effective capital cost for this run: {scaled_capital_cost} DKK/kWh/day")
+            processor = self._get_processor(scenario_name)
 
-            # --- Use the NEW investment model ---
+            # --- Use the NEW investment model, built once for the whole sweep ---
             model = OptModel_battery(processor.hourly_params, processor.system_params)
-            results_df, dual_values = model.solve(capital_cost_per_kwh=scaled_capital_cost)
-            
-            if results_df is not None:
-                # --- Update the summary to print the optimal size ---
-                # You'll need a small change in summary.py for this
-                summary = ResultSummary(
-                    results_df=results_df, 
-                    hourly_params=processor.hourly_params, 
-                    system_params=processor.system_params,
-                    dual_values=dual_values
-                )
-                summary.print_summary()
-
-                visualizer = DataVisualizer(processor, dual_values=dual_values)
-                visualizer.plot_optimization_results(results_df, block=False)
-
-                fig = plt.gcf()
-                fig.canvas.manager.set_window_title(f"Results for {scaled_capital_cost} DKK/kWh/day")
-            else:                
-                    print("...No results to summarize or visualize as the optimization failed.")
         except Exception as e:
-            print(f"\nAn ERROR occurred during the run: {e}")
+            if self.fail_fast:
+                raise
+            # Without the data or the model none of the factors can run
+            print(f"\nAn ERROR occurred while preparing the investment sweep for '{scenario_name}': {e}")
             import traceback
             traceback.print_exc()
-        finally:
-            # Always change back to the original directory
-            os.chdir(original_cwd)
+            return [(investment_cost_scalar, False, e) for investment_cost_scalar in investment_cost_scalars]
+
+        # Define the base capital cost
+        base_capital_cost_per_kwh = 1/6 # DKK/kWh/day
+
+        statuses = []
+        for investment_cost_scalar in investment_cost_scalars:
+            print(f"\n{'='*20} Starting Investment Sizing for: {scenario_name} {'='*20}")
+            print(f"Using investment cost scaling factor: {investment_cost_scalar}")
+            try:
+                scaled_capital_cost = base_capital_cost_per_kwh * investment_cost_scalar
+                print(f"Effective capital cost for this run: {scaled_capital_cost} DKK/kWh/day")
+
+                results_df, dual_values = model.solve(capital_cost_per_kwh=scaled_capital_cost)
+                
+                if results_df is not None:
+                    # --- Update the summary to print the optimal size ---
+                    summary = ResultSummary(
+                        results_df=results_df, 
+                        hourly_params=processor.hourly_params, 
+                        system_params=processor.system_params,
+                        dual_values=dual_values
+                    )
+                    summary.print_summary()
+
+                    self._plot_results(processor, results_df, f"Results for {scaled_capital_cost} DKK/kWh/day",
+                                       f"results_{scenario_name}_investment_{investment_cost_scalar}.png",
+                                       dual_values=dual_values)
+                else:                
+                    print("...No results to summarize or visualize as the optimization failed.")
+                statuses.append((investment_cost_scalar, True, (results_df, dual_values)))
+            except Exception as e:
+                if self.fail_fast:
+                    raise
+                print(f"\nAn ERROR occurred in the run with scaling factor {investment_cost_scalar}: {e}")
+                import traceback
+                traceback.print_exc()
+                statuses.append((investment_cost_scalar, False, e))
+
+        failed = [scalar for scalar, ok, _ in statuses if not ok]
+        if failed:
+            print(f"\n{len(failed)} of {len(statuses)} investment runs failed: {failed}")
+        return statuses
+
+    def _get_processor(self, scenario_name: str) -> DataProcessor:
+        """
+        Returns the processed data for a scenario, loading it on first use.
+        """
+        if scenario_name not in self._processor_cache:
+            loader = DataLoader(input_path=str(self.data_path), question_name=scenario_name)
+            self._processor_cache[scenario_name] = DataProcessor(loader)
+        return self._processor_cache[scenario_name]
+
+    def _plot_results(self, processor: DataProcessor, results_df, window_title: str, file_name: str,
+                      dual_values: Optional[Dict] = None):
+        """
+        Shows the results plot in its own window, or saves it to 'results/' when running headless.
+        """
+        # Imported here so that matplotlib is only loaded once a plot is actually made
+        from data_ops.data_visualizer import DataVisualizer
+
+        visualizer = DataVisualizer(processor, dual_values=dual_values)
+        if self.headless:
+            self.results_path.mkdir(parents=True, exist_ok=True)
+            visualizer.plot_optimization_results(results_df, save_path=self.results_path / file_name)
+            print(f"...Results plot saved to {self.results_path / file_name}")
+        else:
+            fig = visualizer.plot_optimization_results(results_df, block=False)
+            # Give each plot window a unique title
+            fig.canvas.manager.set_window_title(window_title)
@@ -1,2 +1,2 @@
 from .utils import load_dataset, save_model_results, plot_data
-from .summary import ResultSummary
\ No newline at end of file
+from .summary import ResultSummary, summarize_many
\ No newline at end of file
@@ -1,20 +1,72 @@
 
+import sys
+from dataclasses import dataclass, fields
+from enum import IntEnum
+from functools import cached_property
+from typing import TYPE_CHECKING, Dict, Iterable, Optional
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import pandas as pd
+from data_ops._kernels import HAVE_NUMBA, NUMBA_MIN_HOURS, kpi_totals
+
+if TYPE_CHECKING:
+    from data_ops.data_processor import HourlyParams
+
+try:
+    from bottleneck import nansum
+except ImportError:  # fall back to NumPy's NaN-skipping sum
+    from numpy import nansum
+
+class _Total(IntEnum):
+    """ Positions in ResultSummary._totals; the first six follow ResultSummary._SUMMED_COLUMNS. """
+    PV_USED = 0
+    PV_CURTAILED = 1
+    LOAD = 2
+    GRID_IMPORT = 3
+    GRID_EXPORT = 4
+    NET_COST = 5
+    COST_OF_IMPORTS = 6
+    REVENUE_FROM_EXPORTS = 7
+    PV_SELF_CONSUMED = 8
+
+
+@dataclass(frozen=True, slots=True)
+class DualValues:
+    """
+    The dual values reported in a summary, with attribute access instead of dict lookups.
+    Values the model did not provide are None.
+    """
+    min_energy_shadow_price_dkk_kwh: Optional[float] = None
+    hourly_marginal_price_dkk_kwh: Optional[np.ndarray] = None
+    optimal_battery_size_kwh: Optional[float] = None
+
+    @classmethod
+    def from_dict(cls, dual_values: dict) -> "DualValues":
+        values = {f.name: dual_values.get(f.name) for f in fields(cls)}
+        # The models return the hourly duals as a list; convert them once for the vectorized stats
+        if values['hourly_marginal_price_dkk_kwh'] is not None:
+            values['hourly_marginal_price_dkk_kwh'] = np.asarray(values['hourly_marginal_price_dkk_kwh'], dtype=np.float64)
+        return cls(**values)
+
 
 class ResultSummary:
     """
     Calculates and presents a summary of Key Performance Indicators (KPIs)
     from the optimization results.
     """
-    
+    # Result columns reduced by _calculate_kpis, in the order they are stored in _results_array
+    _SUMMED_COLUMNS = ['pv_generation_kw', 'pv_curtailment_kw', 'flexible_load_kw',
+                       'grid_import_kw', 'grid_export_kw', 'hourly_cost_dkk']
+    # Result columns that only some models produce
+    _OPTIONAL_COLUMNS = ['pv_self_consumption_kw', 'battery_charge_kw', 'battery_discharge_kw']
 
-    def __init__(self, results_df: pd.DataFrame, hourly_params: pd.DataFrame, system_params: dict, dual_values: dict):
+    def __init__(self, results_df: pd.DataFrame, hourly_params: "HourlyParams", system_params: dict, dual_values: dict):
         """
         Initializes the summary generator with the results and prepared input data.
 
         Args:
             results_df (pd.DataFrame): The DataFrame with the optimal schedule.
-            hourly_params (pd.DataFrame): The DataFrame with prepared hourly inputs.
+            hourly_params (HourlyParams): The prepared hourly input arrays.
             system_params (dict): The dictionary with prepared system-wide inputs.
         """
         if not isinstance(results_df, pd.DataFrame) or results_df.empty:
@@ -24,123 +76,265 @@ class ResultSummary:
         self.hourly_params = hourly_params
         self.system_params = system_params
         self.dual_values = dual_values
-        
-        self.kpis = {}
-        self._calculate_kpis()
+        # Flags for the optional parts of the summary, looked up once
+        self._has_battery = bool(system_params.get('has_battery', False))
+        self._duals = DualValues.from_dict(dual_values)
+        self._has_min_energy_dual = self._duals.min_energy_shadow_price_dkk_kwh is not None
+        self._has_hourly_dual = self._duals.hourly_marginal_price_dkk_kwh is not None
+        # The KPIs are only calculated when first accessed, each one separately (see the properties below)
 
-    def _calculate_kpis(self):
-        """Private method to calculate all the important numbers."""
-        
-        # --- Energy Totals (kWh) ---
-        self.kpis['total_pv_available'] = self.hourly_params['available_pv_kw'].sum()
-        self.kpis['total_pv_used'] = self.results_df['pv_generation_kw'].sum()
-        self.kpis['total_pv_curtailed'] = self.results_df['pv_curtailment_kw'].sum()
-        self.kpis['total_load_consumption'] = self.results_df['flexible_load_kw'].sum()
-        self.kpis['total_grid_import'] = self.results_df['grid_import_kw'].sum()
-        self.kpis['total_grid_export'] = self.results_df['grid_export_kw'].sum()
-        
-        # --- Financial Totals (DKK) ---
-        self.kpis['net_daily_cost'] = self.results_df['hourly_cost_dkk'].sum()
-        
-        prices = self.hourly_params['energy_price_dkk_kwh']
+    @cached_property
+    def kpis(self) -> dict:
+        """ All KPIs by name, calculated on first access and reused afterwards. """
+        kpis = {
+            'total_pv_available': self.total_pv_available,
+            'total_pv_used': self.total_pv_used,
+            'total_pv_curtailed': self.total_pv_curtailed,
+            'total_load_consumption': self.total_load_consumption,
+            'total_grid_import': self.total_grid_import,
+            'total_grid_export': self.total_grid_export,
+            'net_daily_cost': self.net_daily_cost,
+            'cost_of_imports': self.cost_of_imports,
+            'revenue_from_exports': self.revenue_from_exports,
+            'self_sufficiency_ratio': self.self_sufficiency_ratio,
+            'self_consumption_ratio': self.self_consumption_ratio,
+        }
+        if self._has_battery:
+            kpis['total_battery_charge_kwh'] = self.total_battery_charge_kwh
+            kpis['total_battery_discharge_kwh'] = self.total_battery_discharge_kwh
+            kpis['battery_round_trip_efficiency_percent'] = self.battery_round_trip_efficiency_percent
+        return kpis
+
+    @cached_property
+    def _results_array(self) -> np.ndarray:
+        """
+        All result columns that are summed, pulled out once as one float array so every total
+        comes from a single reduction instead of one pandas .sum() per column.
+        """
+        return self.results_df[self._SUMMED_COLUMNS].to_numpy(dtype=np.float64)
+
+    @cached_property
+    def _columns(self) -> Dict[str, np.ndarray]:
+        """
+        The result columns used by the KPIs as plain arrays by name, so no pandas column lookup or
+        Series is involved in the reductions. Summed columns are views into _results_array.
+        """
+        M = self._results_array
+        columns = {name: M[:, i] for i, name in enumerate(self._SUMMED_COLUMNS)}
+        for name in self._OPTIONAL_COLUMNS:
+            if name in self.results_df.columns:
+                columns[name] = self.results_df[name].to_numpy(dtype=np.float64)
+        return columns
+
+    @cached_property
+    def _prices(self) -> np.ndarray:
+        return np.asarray(self.hourly_params.energy_price_dkk_kwh, dtype=np.float64)
+
+    @cached_property
+    def _totals(self) -> np.ndarray:
+        """
+        The reductions shared by the energy and financial KPIs, in one preallocated float array
+        indexed by _Total: the sum of every column in _SUMMED_COLUMNS, the cost of imports, the
+        revenue from exports and, on the compiled path, the PV self-consumption (NaN otherwise).
+        """
+        totals = np.empty(len(_Total), dtype=np.float64)
+        M = self._results_array
+        cols = self._columns
+        prices = self._prices
         tariffs = self.system_params
-        self.kpis['cost_of_imports'] = (self.results_df['grid_import_kw'] * (prices + tariffs['import_tariff_dkk_kwh'])).sum()
-        self.kpis['revenue_from_exports'] = (self.results_df['grid_export_kw'] * (prices - tariffs['export_tariff_dkk_kwh'])).sum()
-
-        pv_self_consumed = self.results_df[['pv_generation_kw', 'flexible_load_kw']].min(axis=1).sum()
-        if self.kpis['total_load_consumption'] > 0:
-            self.kpis['self_sufficiency_ratio'] = (pv_self_consumed / self.kpis['total_load_consumption']) * 100
-        else: self.kpis['self_sufficiency_ratio'] = 0
-        if self.kpis['total_pv_used'] > 0:
-            self.kpis['self_consumption_ratio'] = (pv_self_consumed / self.kpis['total_pv_used']) * 100
-        else: self.kpis['self_consumption_ratio'] = 0
-
-        if self.system_params.get('has_battery', False):
-            # Calculate total energy flows for the battery
-            total_charged = self.results_df['battery_charge_kw'].sum()
-            total_discharged = self.results_df['battery_discharge_kw'].sum()
-            
-            self.kpis['total_battery_charge_kwh'] = total_charged
-            self.kpis['total_battery_discharge_kwh'] = total_discharged
-            
-            # Calculate round-trip efficiency
-            if total_charged > 0.001: # Avoid division by zero
-                efficiency = (total_discharged / total_charged) * 100
-                self.kpis['battery_round_trip_efficiency_percent'] = efficiency
-            else:
-                self.kpis['battery_round_trip_efficiency_percent'] = 0
+        import_tariff = tariffs['import_tariff_dkk_kwh']
+        export_tariff = tariffs['export_tariff_dkk_kwh']
 
+        if HAVE_NUMBA and M.shape[0] > NUMBA_MIN_HOURS:
+            # Long horizons: every total, both price-weighted sums and the self-consumption in one compiled pass
+            totals[:] = kpi_totals(*(cols[name] for name in self._SUMMED_COLUMNS), prices, import_tariff, export_tariff)
+        else:
+            totals[:len(self._SUMMED_COLUMNS)] = nansum(M, axis=0)
+            # sum(import * (price + tariff)) = sum(import * price) + tariff * sum(import), so no
+            # effective price array is built; likewise for the exports. Like every other
+            # reduction here (and kpi_totals) these skip NaN hours.
+            totals[_Total.COST_OF_IMPORTS] = nansum(cols['grid_import_kw'] * prices) + import_tariff * totals[_Total.GRID_IMPORT]
+            totals[_Total.REVENUE_FROM_EXPORTS] = nansum(cols['grid_export_kw'] * prices) - export_tariff * totals[_Total.GRID_EXPORT]
+            totals[_Total.PV_SELF_CONSUMED] = np.nan
+        return totals
+
+    # --- Energy Totals (kWh) ---
+    @cached_property
+    def total_pv_available(self) -> float:
+        return nansum(self.hourly_params.available_pv_kw)
+
+    @property
+    def total_pv_used(self) -> float:
+        return self._totals[_Total.PV_USED]
+
+    @property
+    def total_pv_curtailed(self) -> float:
+        return self._totals[_Total.PV_CURTAILED]
+
+    @property
+    def total_load_consumption(self) -> float:
+        return self._totals[_Total.LOAD]
+
+    @property
+    def total_grid_import(self) -> float:
+        return self._totals[_Total.GRID_IMPORT]
+
+    @property
+    def total_grid_export(self) -> float:
+        return self._totals[_Total.GRID_EXPORT]
+
+    # --- Financial Totals (DKK) ---
+    @property
+    def net_daily_cost(self) -> float:
+        return self._totals[_Total.NET_COST]
+
+    @property
+    def cost_of_imports(self) -> float:
+        return self._totals[_Total.COST_OF_IMPORTS]
+
+    @property
+    def revenue_from_exports(self) -> float:
+        return self._totals[_Total.REVENUE_FROM_EXPORTS]
+
+    # --- Ratios (%) ---
+    @cached_property
+    def _pv_self_consumed(self) -> float:
+        """ PV energy (kWh) that supplied the load directly. """
+        cols = self._columns
+        # The models add the hourly PV self-consumption to their results; derive it for other result frames
+        if 'pv_self_consumption_kw' in cols:
+            return nansum(cols['pv_self_consumption_kw'])
+        if not np.isnan(self._totals[_Total.PV_SELF_CONSUMED]):
+            return self._totals[_Total.PV_SELF_CONSUMED]
+        return nansum(np.minimum(cols['pv_generation_kw'], cols['flexible_load_kw']))
+
+    @cached_property
+    def self_sufficiency_ratio(self) -> float:
+        # Read the total from the array once, for both the zero check and the division
+        total_load = self._totals[_Total.LOAD]
+        if total_load > 0:
+            return (self._pv_self_consumed / total_load) * 100
+        return 0
+
+    @cached_property
+    def self_consumption_ratio(self) -> float:
+        total_pv_used = self._totals[_Total.PV_USED]
+        if total_pv_used > 0:
+            return (self._pv_self_consumed / total_pv_used) * 100
+        return 0
+
+    # --- Battery (only for results with a battery) ---
+    @cached_property
+    def total_battery_charge_kwh(self) -> float:
+        return nansum(self._columns['battery_charge_kw'])
+
+    @cached_property
+    def total_battery_discharge_kwh(self) -> float:
+        return nansum(self._columns['battery_discharge_kw'])
+
+    @cached_property
+    def battery_round_trip_efficiency_percent(self) -> float:
+        total_charged = self.total_battery_charge_kwh
+        if total_charged > 0.001: # Avoid division by zero
+            return (self.total_battery_discharge_kwh / total_charged) * 100
+        return 0
 
     def print_summary(self):
         """Prints a formatted summary of the calculated KPIs to the console."""
+        k = self.kpis
+        # Collected into one string and written at once, rather than one print call per line
+        lines = []
         
-        print("\n--- Optimization Result Summary ---")
+        lines.append("\n--- Optimization Result Summary ---")
         
         # --- Financial Summary ---
-        print("\n[ Financials ]")
-        net_cost = self.kpis['net_daily_cost']
+        lines.append("\n[ Financials ]")
+        net_cost = k['net_daily_cost']
         if net_cost >= 0:
-            print(f"  Net Daily Cost: {net_cost:.2f} DKK")
+            lines.append(f"  Net Daily Cost: {net_cost:.2f} DKK")
         else:
-            print(f"  Net Daily Profit: {-net_cost:.2f} DKK")
-        print(f"  - Cost of Imports: {self.kpis['cost_of_imports']:.2f} DKK")
-        print(f"  - Revenue from Exports: {self.kpis['revenue_from_exports']:.2f} DKK")
+            lines.append(f"  Net Daily Profit: {-net_cost:.2f} DKK")
+        lines.append(f"  - Cost of Imports: {k['cost_of_imports']:.2f} DKK")
+        lines.append(f"  - Revenue from Exports: {k['revenue_from_exports']:.2f} DKK")
 
         # --- Energy Flow Summary ---
-        print("\n[ Energy Flow (kWh) ]")
-        print(f"  Total Load Consumption: {self.kpis['total_load_consumption']:.2f} kWh")
-        print(f"  - Grid Import: {self.kpis['total_grid_import']:.2f} kWh")
-        print(f"  - Grid Export: {self.kpis['total_grid_export']:.2f} kWh")
+        lines.append("\n[ Energy Flow (kWh) ]")
+        lines.append(f"  Total Load Consumption: {k['total_load_consumption']:.2f} kWh")
+        lines.append(f"  - Grid Import: {k['total_grid_import']:.2f} kWh")
+        lines.append(f"  - Grid Export: {k['total_grid_export']:.2f} kWh")
 
         # --- PV Performance Summary ---
-        print("\n[ PV Performance ]")
-        print(f"  Available PV Generation: {self.kpis['total_pv_available']:.2f} kWh")
-        print(f"  - PV Used (Consumed + Exported): {self.kpis['total_pv_used']:.2f} kWh")
-        print(f"  - PV Curtailed (Wasted): {self.kpis['total_pv_curtailed']:.2f} kWh")
+        lines.append("\n[ PV Performance ]")
+        lines.append(f"  Available PV Generation: {k['total_pv_available']:.2f} kWh")
+        lines.append(f"  - PV Used (Consumed + Exported): {k['total_pv_used']:.2f} kWh")
+        lines.append(f"  - PV Curtailed (Wasted): {k['total_pv_curtailed']:.2f} kWh")
         
         # --- Ratios ---
-        print("\n[ Performance Ratios ]")
-        print(f"  Self-Sufficiency Ratio: {self.kpis['self_sufficiency_ratio']:.1f}% (of load met by own PV)")
-        print(f"  Self-Consumption Ratio: {self.kpis['self_consumption_ratio']:.1f}% (of used PV that supplied the load)")
+        lines.append("\n[ Performance Ratios ]")
+        lines.append(f"  Self-Sufficiency Ratio: {k['self_sufficiency_ratio']:.1f}% (of load met by own PV)")
+        lines.append(f"  Self-Consumption Ratio: {k['self_consumption_ratio']:.1f}% (of used PV that supplied the load)")
 
 
-        print("\n[ Economic Insights (Shadow Prices) ]")
-        if 'min_energy_shadow_price_dkk_kwh' in self.dual_values:
+        lines.append("\n[ Economic Insights (Shadow Prices) ]")
+        if self._has_min_energy_dual:
             # This is for the "hard constraint" problem (1a)
-            shadow_price = self.dual_values['min_energy_shadow_price_dkk_kwh']
+            shadow_price = self._duals.min_energy_shadow_price_dkk_kwh
             marginal_cost = shadow_price # .Pi for ">=" in a min problem is already positive
             
             if abs(marginal_cost) < 0.0001:
-                print("  Marginal Cost of Energy: 0.000 DKK/kWh")
-                print("    (The minimum energy constraint is non-binding)")
+                lines.append("  Marginal Cost of Energy: 0.000 DKK/kWh")
+                lines.append("    (The minimum energy constraint is non-binding)")
             else:
-                print(f"  Marginal Cost of Energy: {marginal_cost:.3f} DKK/kWh")
-                print("    (This is the cost to supply one extra kWh of flexible load)")
+                lines.append(f"  Marginal Cost of Energy: {marginal_cost:.3f} DKK/kWh")
+                lines.append("    (This is the cost to supply one extra kWh of flexible load)")
         
-        elif 'hourly_marginal_price_dkk_kwh' in self.dual_values:
+        elif self._has_hourly_dual:
             # This is for the "soft constraint" problem (1b, 1c)
-            hourly_prices = self.dual_values['hourly_marginal_price_dkk_kwh']
-            avg_marginal_price = sum(hourly_prices) / len(hourly_prices)
-            min_marginal_price = min(hourly_prices)
-            max_marginal_price = max(hourly_prices)
+            hourly_prices = self._duals.hourly_marginal_price_dkk_kwh
+            avg_marginal_price = hourly_prices.mean()
+            min_marginal_price = hourly_prices.min()
+            max_marginal_price = hourly_prices.max()
             
-            print(f"  Average Hourly Marginal Price: {avg_marginal_price:.3f} DKK/kWh")
-            print(f"  - Min Hourly Price: {min_marginal_price:.3f} DKK/kWh")
-            print(f"  - Max Hourly Price: {max_marginal_price:.3f} DKK/kWh")
-            print("    (This is the internal economic value of energy for the consumer each hour)")
+            lines.append(f"  Average Hourly Marginal Price: {avg_marginal_price:.3f} DKK/kWh")
+            lines.append(f"  - Min Hourly Price: {min_marginal_price:.3f} DKK/kWh")
+            lines.append(f"  - Max Hourly Price: {max_marginal_price:.3f} DKK/kWh")
+            lines.append("    (This is the internal economic value of energy for the consumer each hour)")
         
         else:
-            print("  No applicable dual values were calculated for this scenario.")
+            lines.append("  No applicable dual values were calculated for this scenario.")
         
-        if 'total_battery_charge_kwh' in self.kpis:
-            print("\n[ Battery Performance ]")
-            print(f"  Total Energy Charged: {self.kpis['total_battery_charge_kwh']:.2f} kWh")
-            print(f"  Total Energy Discharged: {self.kpis['total_battery_discharge_kwh']:.2f} kWh")
-            print(f"  Round-trip Efficiency: {self.kpis['battery_round_trip_efficiency_percent']:.1f}%")
-
-        if self.system_params.get('has_battery', False):
-            if 'optimal_battery_size_kwh' in self.dual_values:
-                capacity = self.dual_values['optimal_battery_size_kwh']
-                print(f"  Optimal Battery Capacity: {capacity:.2f} kWh (Chosen by model)")
-
-        print("\n------------------------------------")
\ No newline at end of file
+        if 'total_battery_charge_kwh' in k:
+            lines.append("\n[ Battery Performance ]")
+            lines.append(f"  Total Energy Charged: {k['total_battery_charge_kwh']:.2f} kWh")
+            lines.append(f"  Total Energy Discharged: {k['total_battery_discharge_kwh']:.2f} kWh")
+            lines.append(f"  Round-trip Efficiency: {k['battery_round_trip_efficiency_percent']:.1f}%")
+
+        if self._has_battery:
+            if self._duals.optimal_battery_size_kwh is not None:
+                capacity = self._duals.optimal_battery_size_kwh
+                lines.append(f"  Optimal Battery Capacity: {capacity:.2f} kWh (Chosen by model)")
+
+        lines.append("\n------------------------------------")
+        sys.stdout.write("\n".join(lines) + "\n")
+
+
+def summarize_many(summary_args: Iterable[tuple], max_workers: Optional[int] = None) -> list:
+    """
+    Builds the ResultSummary of many independent results (e.g. all scenarios of a sweep) in a
+    thread pool. The KPI reductions run in NumPy or the compiled kernel, which release the GIL.
+
+    Args:
+        summary_args (Iterable[tuple]): One (results_df, hourly_params, system_params, dual_values)
+                                        tuple per summary.
+        max_workers (int, optional): Number of threads; defaults to the ThreadPoolExecutor default.
+
+    Returns:
+        list: The ResultSummary objects with their KPIs calculated, in input order.
+    """
+    def summarize(args):
+        summary = ResultSummary(*args)
+        summary.kpis  # Calculate the KPIs in the worker thread, not on first access by the caller
+        return summary
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(summarize, summary_args))
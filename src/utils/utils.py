@@ -2,30 +2,111 @@
 
 import json
 import csv
+import pickle
+import hashlib
+import threading
 import pandas as pd
 from pathlib import Path
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
-# example function to load data from a specified directory
-def load_dataset(question_name):
-    base_path = Path("../data") / question_name
-    result = {}
- 
-    for file_path in base_path.glob("*"):
-        stem = file_path.stem
-        suffix = file_path.suffix.lower()
+try:
+    import orjson
+except ImportError:  # fall back to the standard library decoder
+    orjson = None
+
+# on-disk cache of parsed datasets, shared across runs; kept next to the data directory
+CACHE_DIR_NAME = ".cache"
+
+def _dataset_fingerprint(files):
+    """Hashes the names, sizes and modification times of the dataset files."""
+    digest = hashlib.sha1()
+    for file_path in files:
+        stat = file_path.stat()
+        digest.update(f"{file_path.name}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+    return digest.hexdigest()[:16]
+
+# marks a file that could not be decoded, so it is left out of the dataset
+_LOAD_FAILED = object()
+
+# decoded file contents keyed on a hash of the raw bytes, so files that are identical
+# across scenario folders (e.g. a shared DER_production.json) are only decoded once. The
+# contents are kept pickled, so every loader gets its own copy and a scenario that modifies
+# its data cannot change another one's; the least recently used entries are dropped first.
+_DECODED_CACHE_SIZE = 64
+_decoded_by_content = OrderedDict()
+_decoded_lock = threading.Lock()
+
+def _decode(raw, suffix):
+    """Decodes the raw bytes of a data file according to its suffix."""
+    if suffix == '.json':
+        return orjson.loads(raw) if orjson is not None else json.loads(raw)
+    elif suffix == '.csv':
+        return list(csv.DictReader(raw.decode().splitlines()))
+    else:
+        return raw.decode()
+
+def _load_one(file_path):
+    """Loads a single data file, reusing the decoded content of identical files."""
+    suffix = file_path.suffix.lower()
  
+    try:
+        raw = file_path.read_bytes()
+        key = (suffix, hashlib.blake2b(raw, digest_size=16).digest())
+        with _decoded_lock:
+            blob = _decoded_by_content.get(key)
+            if blob is not None:
+                _decoded_by_content.move_to_end(key)
+        if blob is None:
+            blob = pickle.dumps(_decode(raw, suffix), protocol=pickle.HIGHEST_PROTOCOL)
+            with _decoded_lock:
+                _decoded_by_content[key] = blob
+                if len(_decoded_by_content) > _DECODED_CACHE_SIZE:
+                    _decoded_by_content.popitem(last=False)
+        return pickle.loads(blob)
+    except Exception as e:
+        print(f"Error loading {file_path}: {e}")
+        return _LOAD_FAILED
+
+# example function to load data from a specified directory
+def load_dataset(question_name, data_root="../data"):
+    """
+    Loads every file of a scenario folder into a dict keyed by file stem. Each call returns a
+    new dict: repeated loads are served from the pickle in the on-disk cache and the decoded
+    files are shared only through copies, so no two loaders share mutable data.
+    """
+    base_path = Path(data_root) / question_name
+    files = sorted(base_path.glob("*"))
+    if not files:
+        return {}
+
+    # Reuse the pickled dataset if none of the files changed since it was written
+    cache_dir = Path(data_root).parent / CACHE_DIR_NAME
+    cache_file = cache_dir / f"{question_name}-{_dataset_fingerprint(files)}.pkl"
+    if cache_file.exists():
         try:
-            if suffix == '.json':
-                with open(file_path, 'r') as f:
-                    result[stem] = json.load(f)
-            elif suffix == '.csv':
-                with open(file_path, 'r') as f:
-                    result[stem] = list(csv.DictReader(f))
-            else:
-                with open(file_path, 'r') as f:
-                    result[stem] = f.read()
-        except Exception as e:
-            print(f"Error loading {file_path}: {e}")
+            with open(cache_file, 'rb') as f:
+                return pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError) as e:
+            print(f"Ignoring unreadable cache {cache_file}: {e}")
+
+    # Decode the files concurrently; reads and the C-level decoders overlap across threads
+    with ThreadPoolExecutor(max_workers=min(8, len(files))) as executor:
+        loaded = list(executor.map(_load_one, files))
+    result = {file_path.stem: data for file_path, data in zip(files, loaded) if data is not _LOAD_FAILED}
+
+    # A file that failed to load may only have failed this time, so an incomplete dataset is never cached
+    if len(result) == len(files):
+        try:
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            with open(cache_file, 'wb') as f:
+                pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+            # Drop the pickles of earlier versions of this scenario's files
+            for stale in cache_dir.glob(f"{question_name}-*.pkl"):
+                if stale != cache_file and len(stale.stem) == len(cache_file.stem):
+                    stale.unlink(missing_ok=True)
+        except OSError as e:
+            print(f"Could not write dataset cache {cache_file}: {e}")
  
     return result
 
@@ -37,4 +118,4 @@ def save_model_results():
 # example function to plot data from a specified directory
 def plot_data():
     """Placeholder for plot_data function."""
-    pass
\ No newline at end of file
+    pass